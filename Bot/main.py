@@ -5,12 +5,14 @@ import os
 import asyncio
 import signal
 from dotenv import load_dotenv
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, InlineQueryHandler, ChosenInlineResultHandler, filters
+from telegram import Update
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, InlineQueryHandler, ChosenInlineResultHandler, TypeHandler, filters
 
 from src.handlers.start_handler import handle_start
+from src.handlers.middleware import gate_update
 from src.handlers.callback_handler import handle_callback, handle_promocode_reply
 from src.handlers.admin_handler import handle_admin
-from src.handlers.inline_handler import handle_inline_query, handle_chosen_inline_result
+from src.handlers.inline_handler import handle_inline_query, handle_chosen_inline_result, warm_services_cache, stop_services_refresh
 from src.handlers.service_handler import handle_show_server
 from src.handlers.admin_commands import (
     handle_add_balance, handle_cut_balance, handle_transaction_history,
@@ -20,8 +22,11 @@ from src.handlers.admin_commands import (
 )
 from src.config.bot_config import BotConfig
 from src.database.user_db import UserDatabase
+from src.database.service_db import get_service_db
 from src.utils.rate_limiter import initialize_rate_limiter, shutdown_rate_limiter
 from src.utils.cache_manager import initialize_cache, shutdown_cache
+from src.utils.user_task_queue import shutdown_user_task_queue
+from src.utils.event_loop import install_uvloop
 
 load_dotenv()
 
@@ -44,6 +49,9 @@ class OTPBot:
             logger.info("🔧 Initializing bot components...")
             
             await self.user_db.initialize()
+            await self.user_db.backfill_transaction_display_dates()
+            # Connect the shared service database now rather than on first use
+            await get_service_db()
             logger.info("✅ Database initialized")
             
             # Initialize utilities
@@ -51,8 +59,23 @@ class OTPBot:
             await initialize_cache()
             logger.info("✅ Utilities initialized")
             
+            # Have the service catalog in memory before the first inline query arrives
+            await warm_services_cache()
+            
             # Create application without job queue to avoid weak reference issues
-            self.application = Application.builder().token(self.config.BOT_TOKEN).job_queue(None).build()
+            # Size the HTTP pool for bursts of concurrent edits; getUpdates gets its own small pool
+            self.application = (
+                Application.builder()
+                .token(self.config.BOT_TOKEN)
+                .job_queue(None)
+                .connection_pool_size(256)
+                .pool_timeout(20)
+                .connect_timeout(10)
+                .read_timeout(20)
+                .write_timeout(20)
+                .get_updates_connection_pool_size(16)
+                .build()
+            )
             logger.info("✅ Application created")
             
             await self._setup_handlers()
@@ -90,6 +113,9 @@ class OTPBot:
             logger.warning(f"Could not set up signal handlers: {e}")
     
     async def _setup_handlers(self):
+        # Group -1 runs first; it stops updates from banned or rate-limited users
+        self.application.add_handler(TypeHandler(Update, gate_update), group=-1)
+        
         self.application.add_handler(CommandHandler("start", handle_start))
         self.application.add_handler(CommandHandler("admin", handle_admin))
         self.application.add_handler(CommandHandler("show_server", handle_show_server))
@@ -127,16 +153,17 @@ class OTPBot:
             await self.application.updater.start_polling(
                 allowed_updates=['message', 'callback_query', 'inline_query', 'chosen_inline_result'],
                 drop_pending_updates=True,
+                # Long-poll up to 30s per getUpdates; read_timeout is added on top for the HTTP read
+                timeout=30,
                 read_timeout=30,
                 write_timeout=30,
                 connect_timeout=30,
                 pool_timeout=30
             )
             
-            # Keep the bot running with a simple loop
+            # Keep the bot running; park on an event that is never set instead of waking every second
             logger.info("✅ Bot is now running and listening for messages...")
-            while True:
-                await asyncio.sleep(1)
+            await asyncio.Event().wait()
             
         except Exception as e:
             logger.error(f"❌ Error starting bot polling: {e}")
@@ -155,6 +182,16 @@ class OTPBot:
                 except Exception as e:
                     logger.warning(f"Application shutdown warning: {e}")
             
+            try:
+                await stop_services_refresh()
+            except Exception as e:
+                logger.warning(f"Service catalog refresh shutdown warning: {e}")
+            
+            try:
+                await shutdown_user_task_queue()
+            except Exception as e:
+                logger.warning(f"User task queue shutdown warning: {e}")
+            
             if self.user_db:
                 try:
                     await self.user_db.close()
@@ -201,6 +238,7 @@ async def main():
             await bot.shutdown()
 
 if __name__ == "__main__":
+    install_uvloop()
     try:
         asyncio.run(main())
     except Exception as e:
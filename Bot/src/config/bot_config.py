@@ -1,9 +1,13 @@
 import os
+import re
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Telegram bot tokens are <numeric bot id>:<secret of letters, digits, '_' and '-'>
+BOT_TOKEN_RE = re.compile(r'\d+:[A-Za-z0-9_-]+')
+
 class BotConfig:
     
     def __init__(self):
@@ -15,8 +19,8 @@ class BotConfig:
         self.ADMIN_USER_ID = self._get_env_var("ADMIN_USER_ID")
         self.BACKEND_URL = self._get_env_var("BACKEND_URL", "http://localhost:3000")
         
-        self.DB_MAX_POOL_SIZE = int(self._get_env_var("DB_MAX_POOL_SIZE", "10"))
-        self.DB_MIN_POOL_SIZE = int(self._get_env_var("DB_MIN_POOL_SIZE", "1"))
+        self.DB_MAX_POOL_SIZE = int(self._get_env_var("DB_MAX_POOL_SIZE", "50"))
+        self.DB_MIN_POOL_SIZE = int(self._get_env_var("DB_MIN_POOL_SIZE", "10"))
         self.DB_MAX_IDLE_TIME_MS = int(self._get_env_var("DB_MAX_IDLE_TIME_MS", "30000"))
         self.DB_CONNECT_TIMEOUT_MS = int(self._get_env_var("DB_CONNECT_TIMEOUT_MS", "10000"))
         self.DB_SOCKET_TIMEOUT_MS = int(self._get_env_var("DB_SOCKET_TIMEOUT_MS", "10000"))
@@ -68,7 +72,7 @@ class BotConfig:
     
     def validate_config(self) -> bool:
         try:
-            if not self.BOT_TOKEN or ':' not in self.BOT_TOKEN:
+            if not self.BOT_TOKEN or not BOT_TOKEN_RE.fullmatch(self.BOT_TOKEN):
                 logger.error("Invalid BOT_TOKEN format")
                 return False
             
@@ -9,6 +9,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Characters never allowed in names; searched by the validators and stripped by sanitize_input
+_UNSAFE_CHARS = '<>"\''
+_UNSAFE_CHARS_RE = re.compile(f'[{_UNSAFE_CHARS}]')
+_UNSAFE_CHARS_TABLE = str.maketrans('', '', _UNSAFE_CHARS)
+
 class SecurityConfig:
     """Security configuration for the OTP Bot"""
     
@@ -94,7 +99,7 @@ class SecurityConfig:
             text = pattern.sub('', text)
         
         # Remove other dangerous characters
-        text = re.sub(r'[<>"\']', '', text)
+        text = text.translate(_UNSAFE_CHARS_TABLE)
         
         return text.strip()
     
@@ -114,7 +119,7 @@ class SecurityConfig:
             return False
         
         # Check for dangerous characters
-        if re.search(r'[<>"\']', username):
+        if _UNSAFE_CHARS_RE.search(username):
             return False
         
         return True
@@ -128,7 +133,7 @@ class SecurityConfig:
             return False
         
         # Check for dangerous characters
-        if re.search(r'[<>"\']', first_name):
+        if _UNSAFE_CHARS_RE.search(first_name):
             return False
         
         return True
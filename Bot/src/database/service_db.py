@@ -7,8 +7,6 @@ from typing import Optional, Dict, Any, List
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 import logging
-import aiohttp
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +38,14 @@ class ServiceDatabase:
             
             logger.info(f"🔗 Connecting to MongoDB for services...")
             
-            self.client = AsyncIOMotorClient(config.MONGODB_URI)
+            self.client = AsyncIOMotorClient(
+                config.MONGODB_URI,
+                maxPoolSize=config.DB_MAX_POOL_SIZE,
+                minPoolSize=config.DB_MIN_POOL_SIZE,
+                maxIdleTimeMS=config.DB_MAX_IDLE_TIME_MS,
+                connectTimeoutMS=config.DB_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=config.DB_SOCKET_TIMEOUT_MS
+            )
             self.db = self.client[config.MONGODB_DATABASE]
             self.services_collection = self.db['services']
             self.servers_collection = self.db['servers']
@@ -66,94 +71,6 @@ class ServiceDatabase:
             logger.error(f"Error getting service {service_name}: {e}")
             return None
     
-    async def get_servers_for_service(self, service_id: str) -> List[Dict[str, Any]]:
-        """Get all servers that have the specified service enabled"""
-        try:
-            if not self._initialized:
-                await self.initialize()
-            
-            logger.info(f"🔍 DEBUG: Looking for servers with service_id: {service_id}")
-            logger.info(f"🔍 DEBUG: Service ID type: {type(service_id)}")
-            
-            # First, let's check what's in the servers collection
-            logger.info("🔍 DEBUG: Checking all servers in collection...")
-            all_servers_cursor = self.servers_collection.find({})
-            all_servers = await all_servers_cursor.to_list(length=None)
-            logger.info(f"🔍 DEBUG: Total servers in collection: {len(all_servers)}")
-            
-            for i, server in enumerate(all_servers):
-                logger.info(f"🔍 DEBUG: Server {i+1}:")
-                logger.info(f"  - ID: {server.get('_id')}")
-                logger.info(f"  - Name: {server.get('name')}")
-                logger.info(f"  - Enabled services: {server.get('enabled_services')}")
-                logger.info(f"  - Enabled services type: {type(server.get('enabled_services'))}")
-                if server.get('enabled_services'):
-                    for j, enabled_service in enumerate(server.get('enabled_services')):
-                        logger.info(f"    - Service {j+1}: {enabled_service} (type: {type(enabled_service)})")
-            
-            # Now let's check what's in the services collection
-            logger.info("🔍 DEBUG: Checking all services in collection...")
-            all_services_cursor = self.services_collection.find({})
-            all_services = await all_services_cursor.to_list(length=None)
-            logger.info(f"🔍 DEBUG: Total services in collection: {len(all_services)}")
-            
-            for i, service in enumerate(all_services):
-                logger.info(f"🔍 DEBUG: Service {i+1}:")
-                logger.info(f"  - ID: {service.get('_id')}")
-                logger.info(f"  - Name: {service.get('name')}")
-                logger.info(f"  - ID type: {type(service.get('_id'))}")
-                logger.info(f"  - ID string: {str(service.get('_id'))}")
-            
-            # Find servers where enabled_services includes the service_id
-            logger.info(f"🔍 DEBUG: Searching for servers with enabled_services containing: {service_id}")
-            
-            # Try different search approaches
-            search_query = {"enabled_services": service_id}
-            logger.info(f"🔍 DEBUG: Search query: {search_query}")
-            
-            cursor = self.servers_collection.find(search_query)
-            servers = await cursor.to_list(length=None)
-            logger.info(f"🔍 DEBUG: Found {len(servers)} servers for service {service_id}")
-            
-            # Debug: Print each server
-            for i, server in enumerate(servers):
-                logger.info(f"🔍 DEBUG: Server {i+1} data: {server}")
-            
-            # If no servers found, try alternative search
-            if not servers:
-                logger.info("🔍 DEBUG: No servers found with exact match, trying alternative searches...")
-                
-                # Try searching with ObjectId
-                try:
-                    from bson import ObjectId
-                    object_id = ObjectId(service_id)
-                    logger.info(f"🔍 DEBUG: Trying search with ObjectId: {object_id}")
-                    cursor2 = self.servers_collection.find({"enabled_services": object_id})
-                    servers2 = await cursor2.to_list(length=None)
-                    logger.info(f"🔍 DEBUG: Found {len(servers2)} servers with ObjectId search")
-                    if servers2:
-                        servers = servers2
-                except Exception as e:
-                    logger.info(f"🔍 DEBUG: ObjectId search failed: {e}")
-                
-                # Try searching with string conversion
-                if not servers:
-                    logger.info("🔍 DEBUG: Trying search with string conversion...")
-                    cursor3 = self.servers_collection.find({"enabled_services": str(service_id)})
-                    servers3 = await cursor3.to_list(length=None)
-                    logger.info(f"🔍 DEBUG: Found {len(servers3)} servers with string search")
-                    if servers3:
-                        servers = servers3
-            
-            logger.info(f"🔍 DEBUG: Final result: {len(servers)} servers found")
-            return servers
-            
-        except Exception as e:
-            logger.error(f"Error getting servers for service {service_id}: {e}")
-            import traceback
-            logger.error(f"❌ Full traceback: {traceback.format_exc()}")
-            return []
-    
     async def get_server_by_id(self, server_id: str) -> Optional[Dict[str, Any]]:
         """Get server by ID"""
         try:
@@ -173,128 +90,17 @@ class ServiceDatabase:
             if not self._initialized:
                 await self.initialize()
             
-            logger.info(f"🔍 DEBUG: Getting service by ID: {service_id}")
-            logger.info(f"🔍 DEBUG: Service ID type: {type(service_id)}")
-            
             from bson import ObjectId
             service = await self.services_collection.find_one({"_id": ObjectId(service_id)})
             
-            if service:
-                logger.info(f"🔍 DEBUG: Found service: {service}")
-            else:
-                logger.info(f"🔍 DEBUG: Service not found with ID: {service_id}")
+            if not service:
+                logger.debug("🔍 Service not found with ID: %s", service_id)
             
             return service
         except Exception as e:
             logger.error(f"Error getting service {service_id}: {e}")
-            import traceback
-            logger.error(f"❌ Full traceback: {traceback.format_exc()}")
             return None
     
-    async def call_server_api(self, server: Dict[str, Any], service_name: str) -> Dict[str, Any]:
-        """Call server API to fetch a number"""
-        try:
-            api_config = server.get('api', {})
-            
-            if not api_config:
-                return {"success": False, "error": "No API configuration found"}
-            
-            # Extract API configuration
-            api_base_url = api_config.get('api_base_url')
-            api_key = api_config.get('api_key')
-            endpoints = api_config.get('endpoints', {})
-            fetch_number_endpoint = endpoints.get('fetch_number')
-            http_method = api_config.get('http_method', 'GET').upper()
-            default_params = api_config.get('default_params', {})
-            headers = api_config.get('headers', {})
-            timeout_ms = api_config.get('timeout_ms', 30000)
-            
-            if not api_base_url or not fetch_number_endpoint:
-                return {"success": False, "error": "Missing API configuration"}
-            
-            # Prepare request
-            url = f"{api_base_url.rstrip('/')}/{fetch_number_endpoint.lstrip('/')}"
-            
-            # Prepare headers
-            request_headers = {
-                'Content-Type': 'application/json',
-                **headers
-            }
-            
-            if api_key:
-                request_headers['Authorization'] = f'Bearer {api_key}'
-            
-            # Prepare parameters
-            params = {
-                **default_params,
-                'service': service_name.upper()
-            }
-            
-            logger.info(f"🌐 Calling server API: {url}")
-            logger.info(f"📋 Method: {http_method}")
-            logger.info(f"📋 Params: {params}")
-            
-            # Make API call
-            async with aiohttp.ClientSession() as session:
-                if http_method == 'GET':
-                    async with session.get(url, params=params, headers=request_headers, timeout=timeout_ms/1000) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            logger.info(f"✅ Server API response: {data}")
-                            return {"success": True, "data": data}
-                        else:
-                            error_text = await response.text()
-                            logger.error(f"❌ Server API error: {response.status} - {error_text}")
-                            return {"success": False, "error": f"API returned {response.status}"}
-                
-                elif http_method == 'POST':
-                    async with session.post(url, json=params, headers=request_headers, timeout=timeout_ms/1000) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            logger.info(f"✅ Server API response: {data}")
-                            return {"success": True, "data": data}
-                        else:
-                            error_text = await response.text()
-                            logger.error(f"❌ Server API error: {response.status} - {error_text}")
-                            return {"success": False, "error": f"API returned {response.status}"}
-                
-                else:
-                    return {"success": False, "error": f"Unsupported HTTP method: {http_method}"}
-                    
-        except asyncio.TimeoutError:
-            logger.error(f"❌ Server API timeout: {server.get('name', 'Unknown')}")
-            return {"success": False, "error": "Request timeout"}
-        except Exception as e:
-            logger.error(f"❌ Server API error: {e}")
-            return {"success": False, "error": str(e)}
-    
-    async def debug_servers_collection(self):
-        """Debug method to check servers collection"""
-        try:
-            if not self._initialized:
-                await self.initialize()
-            
-            logger.info("🔍 DEBUG: Checking servers collection...")
-            
-            # Get all servers
-            cursor = self.servers_collection.find({})
-            all_servers = await cursor.to_list(length=None)
-            
-            logger.info(f"🔍 DEBUG: Total servers in collection: {len(all_servers)}")
-            
-            for i, server in enumerate(all_servers):
-                logger.info(f"🔍 DEBUG: Server {i+1}:")
-                logger.info(f"  - _id: {server.get('_id')}")
-                logger.info(f"  - name: {server.get('name')}")
-                logger.info(f"  - enabled_services: {server.get('enabled_services')}")
-                logger.info(f"  - country_code: {server.get('country_code')}")
-                logger.info(f"  - rating: {server.get('rating')}")
-            
-        except Exception as e:
-            logger.error(f"❌ Error debugging servers collection: {e}")
-            import traceback
-            logger.error(f"❌ Full traceback: {traceback.format_exc()}")
-
     async def close(self):
         """Close database connection"""
         if self.client:
@@ -472,8 +278,8 @@ class ServiceDatabase:
             logger.info("🔄 Starting complete data sync with website...")
             
             # Import UserDatabase for user sync
-            from .user_db import UserDatabase
-            user_db = UserDatabase()
+            from .user_db import get_user_db
+            user_db = await get_user_db()
             
             # Sync users
             user_sync_result = await user_db.sync_all_users_with_website()
@@ -562,3 +368,20 @@ class ServiceDatabase:
         except Exception as e:
             logger.error(f"❌ Error getting website servers: {e}")
             return []
+
+_service_db: Optional[ServiceDatabase] = None
+_service_db_lock = asyncio.Lock()
+
+async def get_service_db() -> ServiceDatabase:
+    """Return the shared, initialized ServiceDatabase"""
+    global _service_db
+    if _service_db is not None and _service_db.client is not None:
+        return _service_db
+    
+    # Concurrent first callers wait for one connection instead of each opening a client
+    async with _service_db_lock:
+        if _service_db is None or _service_db.client is None:
+            service_db = ServiceDatabase()
+            await service_db.initialize()
+            _service_db = service_db
+    return _service_db
@@ -3,8 +3,11 @@ User Database Module
 """
 
 import asyncio
+import re
+import time
 from typing import Optional, Dict, Any, List
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 from datetime import datetime
 import logging
 from contextlib import asynccontextmanager
@@ -12,6 +15,63 @@ from src.utils.cache_manager import cached
 
 logger = logging.getLogger(__name__)
 
+TRANSACTION_DATE_FORMAT = "%-m/%-d/%Y, %-I:%M:%S %p"
+
+# Fields get_services reads; everything else in a service document stays on the server
+SERVICE_LIST_PROJECTION = {"name": 1, "description": 1, "price": 1, "server_name": 1, "is_active": 1}
+SAMPLE_SERVICE_PROJECTION = {"service_name": 1, "service_description": 1, "service_price": 1, "server_name": 1, "is_active": 1}
+
+# Placeholder names that never reach the bot's service lists (compared lower-cased and stripped)
+INVALID_SERVICE_NAMES = frozenset({"", "unknown", "unknown service"})
+
+# Broadcasts only need the chat to send to, not each user's embedded histories
+USER_ID_PROJECTION = {"_id": 0, "user_id": 1}
+
+# Case-insensitive comparison for service names; queries must pass it to use the name index
+SERVICE_NAME_COLLATION = {"locale": "en", "strength": 2}
+
+def _service_summary(service: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a projected service document the way get_services returns it"""
+    return {
+        "id": str(service.get("_id")),
+        "name": service.get("name", "").strip(),
+        "description": service.get("description", "No description available"),
+        "price": service.get("price", "₹0"),
+        "server": service.get("server_name", "Unknown Server"),
+    }
+
+# /start only shows profile fields and counters; the embedded histories stay in MongoDB.
+# Summaries are kept briefly per user and dropped by every write that changes those fields
+USER_SUMMARY_PROJECTION = {"transaction_history": 0, "number_history": 0, "smm_history": 0}
+USER_SUMMARY_TTL = 30
+USER_SUMMARY_MAX_ENTRIES = 10000
+_user_summaries: Dict[int, tuple] = {}  # user_id -> (cached_at, summary)
+
+def _normalize_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace wrongly typed profile fields (e.g. written by the website) with defaults, in place"""
+    if not isinstance(user.get("first_name"), str):
+        user["first_name"] = None
+    if not isinstance(user.get("balance"), (int, float)):
+        user["balance"] = 0.0
+    for field in ("total_purchased", "total_used"):
+        if not isinstance(user.get(field), int):
+            user[field] = 0
+    return user
+
+def forget_user_summary(user_id: int):
+    """Drop a user's cached summary and cached user documents after their document changes"""
+    _user_summaries.pop(user_id, None)
+    # Otherwise a balance read after a credit or debit could be up to five minutes old
+    UserDatabase.get_or_create_user.cache_delete(user_id)
+
+# _id of the marker in the migrations collection written once the display-date backfill has run
+TRANSACTION_DATES_MIGRATION = "transaction_display_dates"
+
+def _transaction_timestamps() -> Dict[str, Any]:
+    """Timestamp fields for a new transaction; the display string is formatted once here instead of on every read"""
+    now = datetime.utcnow()
+    return {"created_at": now, "created_at_display": now.strftime(TRANSACTION_DATE_FORMAT)}
+
 class UserDatabase:
     """Database handler for user operations with connection pooling"""
     _instance = None
@@ -24,9 +84,6 @@ class UserDatabase:
             cls._instance.client: Optional[AsyncIOMotorClient] = None
             cls._instance.db = None
             cls._instance.users_collection = None
-            cls._instance._max_pool_size = 10
-            cls._instance._min_pool_size = 1
-            cls._instance._max_idle_time_ms = 30000
         return cls._instance
     
     def __init__(self):
@@ -46,12 +103,12 @@ class UserDatabase:
             # Create client with connection pooling settings
             self.client = AsyncIOMotorClient(
                 config.MONGODB_URI,
-                maxPoolSize=self._max_pool_size,
-                minPoolSize=self._min_pool_size,
-                maxIdleTimeMS=self._max_idle_time_ms,
+                maxPoolSize=config.DB_MAX_POOL_SIZE,
+                minPoolSize=config.DB_MIN_POOL_SIZE,
+                maxIdleTimeMS=config.DB_MAX_IDLE_TIME_MS,
                 serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=10000
+                connectTimeoutMS=config.DB_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=config.DB_SOCKET_TIMEOUT_MS
             )
             
             self.db = self.client[config.MONGODB_DATABASE]
@@ -64,6 +121,19 @@ class UserDatabase:
             )
             
             logger.info("✅ MongoDB connected successfully with connection pooling!")
+            
+            # Every user lookup (including transaction paging) filters on user_id
+            try:
+                await self.users_collection.create_index("user_id")
+            except Exception as e:
+                logger.warning(f"Could not ensure user_id index: {e}")
+            
+            # /show_server looks service variants up by name, ignoring case
+            try:
+                await self.db['services'].create_index("name", name="name_ci", collation=SERVICE_NAME_COLLATION)
+            except Exception as e:
+                logger.warning(f"Could not ensure service name index: {e}")
+            
             self._initialized = True
             
         except asyncio.TimeoutError:
@@ -100,7 +170,8 @@ class UserDatabase:
             logger.warning("Database connection lost, reconnecting...")
             await self.initialize()
     
-    @cached(ttl=300, key_prefix="user")
+    # Keyed by user id alone so a write can drop just that user's document; the name arguments only matter on create
+    @cached(ttl=300, key_prefix="user", key=lambda self, user_id, *args, **kwargs: user_id)
     async def get_or_create_user(self, user_id: int, username: str = None, first_name: str = None) -> Dict[str, Any]:
         """Get user from database or create if not exists with connection management and caching"""
         try:
@@ -130,7 +201,7 @@ class UserDatabase:
                 logger.info(f"Created new user: {user_id}")
                 return user_data
             
-            return user
+            return _normalize_user(user)
             
         except Exception as e:
             logger.error(f"Error getting/creating user {user_id}: {e}")
@@ -148,6 +219,39 @@ class UserDatabase:
                 "banned": False
             }
     
+    async def get_user_summary(self, user_id: int, username: str = None, first_name: str = None) -> Dict[str, Any]:
+        """Get a user without their histories, creating them if needed, from a short-lived per-process cache"""
+        cached = _user_summaries.get(user_id)
+        if cached and time.monotonic() - cached[0] < USER_SUMMARY_TTL:
+            return cached[1]
+        
+        try:
+            await self._ensure_connection()
+            user = await self.users_collection.find_one({"user_id": user_id}, USER_SUMMARY_PROJECTION)
+        except Exception as e:
+            logger.error(f"Error getting summary for user {user_id}: {e}")
+            user = None
+        
+        if not user:
+            # New user (or the lookup failed): fall back to the full get-or-create path, uncached
+            user = await self.get_or_create_user(user_id, username, first_name)
+            return {key: value for key, value in user.items() if key not in USER_SUMMARY_PROJECTION}
+        
+        _normalize_user(user)
+        if len(_user_summaries) >= USER_SUMMARY_MAX_ENTRIES:
+            # Evict the oldest entry; dicts keep insertion order
+            _user_summaries.pop(next(iter(_user_summaries)))
+        _user_summaries[user_id] = (time.monotonic(), user)
+        return user
+    
+    async def get_user_balance(self, user_id: int) -> float:
+        """Read a user's current balance straight from MongoDB, bypassing every cache"""
+        if not self._initialized:
+            await self.initialize()
+        
+        user = await self.users_collection.find_one({"user_id": user_id}, {"_id": 0, "balance": 1})
+        return float(user.get("balance", 0.0)) if user else 0.0
+    
     async def update_user_balance(self, user_id: int, amount: float):
         """Update user balance"""
         try:
@@ -158,6 +262,7 @@ class UserDatabase:
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
+            forget_user_summary(user_id)
         except Exception as e:
             logger.error(f"Error updating balance for user {user_id}: {e}")
     
@@ -171,6 +276,7 @@ class UserDatabase:
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
+            forget_user_summary(user_id)
         except Exception as e:
             logger.error(f"Error incrementing purchased count for user {user_id}: {e}")
     
@@ -184,6 +290,7 @@ class UserDatabase:
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
+            forget_user_summary(user_id)
         except Exception as e:
             logger.error(f"Error incrementing used count for user {user_id}: {e}")
     
@@ -204,7 +311,7 @@ class UserDatabase:
                 "reason": f"Admin added {amount} balance",
                 "amount": amount,
                 "closing_balance": new_balance,
-                "created_at": datetime.utcnow()
+                **_transaction_timestamps()
             }
             
             # Update user document with new balance and transaction
@@ -220,6 +327,7 @@ class UserDatabase:
                     }
                 }
             )
+            forget_user_summary(user_id)
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Error adding balance for user {user_id}: {e}")
@@ -245,7 +353,7 @@ class UserDatabase:
                 "reason": f"Admin cut {amount} balance",
                 "amount": amount,
                 "closing_balance": new_balance,
-                "created_at": datetime.utcnow()
+                **_transaction_timestamps()
             }
             
             result = await self.users_collection.update_one(
@@ -260,6 +368,7 @@ class UserDatabase:
                     }
                 }
             )
+            forget_user_summary(user_id)
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Error cutting balance for user {user_id}: {e}")
@@ -288,6 +397,7 @@ class UserDatabase:
                 {"user_id": user_id},
                 {"$set": {"banned": True, "updated_at": datetime.utcnow()}}
             )
+            forget_user_summary(user_id)
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Error banning user {user_id}: {e}")
@@ -300,15 +410,24 @@ class UserDatabase:
                 {"user_id": user_id},
                 {"$set": {"banned": False, "updated_at": datetime.utcnow()}}
             )
+            forget_user_summary(user_id)
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Error unbanning user {user_id}: {e}")
             return False
     
-    async def get_all_users(self) -> List[Dict[str, Any]]:
-        """Get all users for broadcast"""
+    async def get_banned_user_ids(self) -> set:
+        """Get the IDs of all banned users"""
         try:
-            cursor = self.users_collection.find({})
+            return set(await self.users_collection.distinct("user_id", {"banned": True}))
+        except Exception as e:
+            logger.error(f"Error getting banned users: {e}")
+            return set()
+    
+    async def get_all_users(self, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Get all users for broadcast, optionally only the projected fields"""
+        try:
+            cursor = self.users_collection.find({}, projection)
             users = await cursor.to_list(length=None)
             return users
         except Exception as e:
@@ -319,6 +438,7 @@ class UserDatabase:
         """Clear all data from the collection"""
         try:
             result = await self.users_collection.delete_many({})
+            _user_summaries.clear()
             logger.info(f"Cleared {result.deleted_count} documents from users collection")
             return result.deleted_count
         except Exception as e:
@@ -371,7 +491,7 @@ class UserDatabase:
                 "reason": reason,
                 "amount": amount,
                 "closing_balance": new_balance,
-                "created_at": datetime.utcnow()
+                **_transaction_timestamps()
             }
             
             # Update user document with new balance and transaction
@@ -387,6 +507,7 @@ class UserDatabase:
                     }
                 }
             )
+            forget_user_summary(user_id)
             
             if result.modified_count > 0:
                 logger.info(f"Transaction logged for user {user_id}: {transaction_type} {amount} - {reason}")
@@ -399,13 +520,18 @@ class UserDatabase:
             logger.error(f"Error logging transaction for user {user_id}: {e}")
             return False
 
-    async def get_user_transactions(self, user_id: int, page: int = 1, per_page: int = 4) -> dict:
+    async def get_user_transactions(self, user_id: int, before: Optional[int] = None, per_page: int = 4) -> dict:
         """
-        Get user transactions with pagination
+        Get user transactions with keyset pagination
+        
+        transaction_history is append-only, so a transaction's position in the
+        array is a stable cursor: a page is the per_page transactions just
+        below `before`. Only that slice and the array size leave MongoDB, and
+        paging stays consistent while new transactions are appended.
         
         Args:
             user_id: User ID
-            page: Page number (1-based)
+            before: Exclusive cursor from a previous page (None for the newest page)
             per_page: Transactions per page
             
         Returns:
@@ -413,42 +539,67 @@ class UserDatabase:
                 "transactions": [...],
                 "total_pages": int,
                 "current_page": int,
-                "total_transactions": int
+                "total_transactions": int,
+                "next_before": int or None,
+                "prev_before": int or None
             }
         """
         try:
-            user = await self.users_collection.find_one({"user_id": user_id})
-            if not user:
+            history = {"$ifNull": ["$transaction_history", []]}
+            size = {"$size": history}
+            end_expr = size if before is None else {"$min": [max(0, before), size]}
+            
+            cursor = self.users_collection.aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$limit": 1},
+                {"$project": {
+                    "_id": 0,
+                    "total": size,
+                    "transactions": {"$let": {
+                        "vars": {"end": end_expr},
+                        "in": {"$cond": [
+                            {"$gt": ["$$end", 0]},
+                            {"$slice": [
+                                history,
+                                {"$max": [0, {"$subtract": ["$$end", per_page]}]},
+                                {"$min": [per_page, "$$end"]}
+                            ]},
+                            []
+                        ]}
+                    }}
+                }}
+            ])
+            results = await cursor.to_list(length=1)
+            if not results:
                 return None
             
-            transactions = user.get("transaction_history", [])
-            total_transactions = len(transactions)
+            total_transactions = results[0].get("total", 0)
             
             if total_transactions == 0:
                 return {
                     "transactions": [],
                     "total_pages": 0,
                     "current_page": 1,
-                    "total_transactions": 0
+                    "total_transactions": 0,
+                    "next_before": None,
+                    "prev_before": None
                 }
             
-            # Calculate pagination
-            total_pages = (total_transactions + per_page - 1) // per_page
-            page = max(1, min(page, total_pages))  # Ensure page is within bounds
-            
-            # Get transactions for current page (most recent first)
-            start_index = (page - 1) * per_page
-            end_index = start_index + per_page
+            # Same bounds the pipeline used
+            end_index = total_transactions if before is None else min(max(0, before), total_transactions)
+            start_index = max(0, end_index - per_page)
             
             # Reverse to show most recent first
-            reversed_transactions = list(reversed(transactions))
-            page_transactions = reversed_transactions[start_index:end_index]
+            page_transactions = results[0].get("transactions", [])
+            page_transactions.reverse()
             
             return {
                 "transactions": page_transactions,
-                "total_pages": total_pages,
-                "current_page": page,
-                "total_transactions": total_transactions
+                "total_pages": (total_transactions + per_page - 1) // per_page,
+                "current_page": (total_transactions - end_index) // per_page + 1,
+                "total_transactions": total_transactions,
+                "next_before": start_index if start_index > 0 else None,
+                "prev_before": min(total_transactions, end_index + per_page) if end_index < total_transactions else None
             }
             
         except Exception as e:
@@ -529,20 +680,50 @@ class UserDatabase:
             
             logger.info(f"✅ Updated promocode usage count: {promocode.upper()}")
             
-            # Add balance to user
+            # Credit the balance and append its history entry in one atomic write. The update pipeline
+            # computes closing_balance from the stored balance and returns the updated document
             amount = check_result["amount"]
-            success = await self.log_transaction(user_id, "credit", f"Promocode: {promocode.upper()}", amount)
+            new_balance = {"$add": [{"$ifNull": ["$balance", 0.0]}, amount]}
+            transaction_record = {
+                "type": "credit",
+                "reason": f"Promocode: {promocode.upper()}",
+                "amount": amount,
+                **_transaction_timestamps()
+            }
+            updated_user = await self.users_collection.find_one_and_update(
+                {"user_id": user_id},
+                [{
+                    "$set": {
+                        "balance": new_balance,
+                        "updated_at": datetime.utcnow(),
+                        "transaction_history": {"$concatArrays": [
+                            {"$ifNull": ["$transaction_history", []]},
+                            [{
+                                # Literal values so a reason starting with '$' is never read as a field path
+                                **{key: {"$literal": value} for key, value in transaction_record.items()},
+                                "closing_balance": new_balance
+                            }]
+                        ]}
+                    }
+                }],
+                projection={"balance": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            forget_user_summary(user_id)
             
-            if success:
-                logger.info(f"✅ Successfully added {amount} 💎 to user {user_id} via promocode {promocode.upper()}")
-                return {
-                    "valid": True,
-                    "amount": amount,
-                    "message": f"Successfully added {amount} 💎 to your balance!"
-                }
-            else:
+            if not updated_user:
                 logger.error(f"❌ Failed to add balance for user {user_id} via promocode {promocode.upper()}")
                 return {"valid": False, "message": "Failed to add balance"}
+            
+            closing_balance = updated_user.get("balance", 0.0)
+            
+            logger.info(f"✅ Successfully added {amount} 💎 to user {user_id} via promocode {promocode.upper()}")
+            return {
+                "valid": True,
+                "amount": amount,
+                "closing_balance": closing_balance,
+                "message": f"Successfully added {amount} 💎 to your balance!"
+            }
                 
         except Exception as e:
             logger.error(f"❌ Error using promocode: {e}")
@@ -557,94 +738,42 @@ class UserDatabase:
                 await self.initialize()
             
             logger.info("🔍 Fetching services from database...")
-            logger.info(f"🔍 Database connection status: {self.client is not None}")
-            logger.info(f"🔍 Database name: {self.db.name}")
             
             # Use existing database connection but different collection
             services_collection = self.db['services']
-            logger.info(f"🔍 Services collection: {services_collection}")
-            
-            # First, let's check if the collection exists and has any documents
-            total_services = await services_collection.count_documents({})
-            logger.info(f"📊 Total services in collection: {total_services}")
-            
-            # Get all services (not just active ones for now)
-            cursor = services_collection.find({})
-            all_services = await cursor.to_list(length=None)
-            
-            logger.info(f"📦 Found {len(all_services)} total services")
-            
-            # Debug: Print each service
-            for i, service in enumerate(all_services):
-                logger.info(f"🔍 Service {i+1}:")
-                logger.info(f"  - ID: {service.get('_id')}")
-                logger.info(f"  - Name: {service.get('name')}")
-                logger.info(f"  - Description: {service.get('description')}")
-                logger.info(f"  - Price: {service.get('price')}")
-                logger.info(f"  - Server Name: {service.get('server_name')}")
-                logger.info(f"  - Is Active: {service.get('is_active')}")
-                logger.info(f"  - Full service data: {service}")
-            
-            # Filter for active services if the field exists
-            active_services = []
-            for service in all_services:
-                # Check if service is active (default to True if field doesn't exist)
-                is_active = service.get("is_active", True)
-                logger.info(f"🔍 Service '{service.get('name', 'Unknown')}' active status: {is_active}")
-                if is_active:
-                    active_services.append(service)
-                    logger.info(f"  - ✅ Added to active services")
-                else:
-                    logger.info(f"  - ❌ Skipped (inactive)")
-            
-            logger.info(f"✅ Found {len(active_services)} active services")
             
-            # Format services for bot
+            # Filter and format while streaming the projected documents, so the raw documents
+            # are never held as a list and each one is turned into its summary in a single pass
             formatted_services = []
-            for service in active_services:
-                service_id = str(service.get("_id"))
-                service_name = service.get("name", "").strip()
-                service_desc = service.get("description", "No description available")
-                service_price = service.get("price", "₹0")
-                service_server = service.get("server_name", "Unknown Server")
+            total_services = 0
+            async for service in services_collection.find({}, SERVICE_LIST_PROJECTION):
+                total_services += 1
+                # Check if service is active (default to True if field doesn't exist)
+                if not service.get("is_active", True):
+                    continue
                 
+                summary = _service_summary(service)
                 # Skip services with empty or invalid names
-                if not service_name or service_name.lower() == "unknown service" or service_name.lower() == "unknown":
-                    logger.info(f"🔍 Skipping service with invalid name: '{service_name}'")
+                if summary["name"].lower() in INVALID_SERVICE_NAMES:
+                    logger.debug("🔍 Skipping service with invalid name: '%s'", summary["name"])
                     continue
-                
-                logger.info(f"🔍 Formatting service: {service_name}")
-                logger.info(f"  - ID: {service_id}")
-                logger.info(f"  - Name: {service_name}")
-                logger.info(f"  - Description: {service_desc}")
-                logger.info(f"  - Price: {service_price}")
-                logger.info(f"  - Server: {service_server}")
-                
-                formatted_service = {
-                    "id": service_id,
-                    "name": service_name,
-                    "description": service_desc,
-                    "price": service_price,
-                    "server": service_server
-                }
-                formatted_services.append(formatted_service)
-                logger.info(f"  - ✅ Formatted service added")
+                formatted_services.append(summary)
             
-            logger.info(f"✅ Formatted {len(formatted_services)} services for bot display")
+            logger.info("✅ Formatted %s of %s services for bot display", len(formatted_services), total_services)
             
             # If no services found, add some sample services for testing
             if len(formatted_services) == 0:
                 logger.info("📝 No services found, adding sample services for testing...")
                 await self.add_sample_services()
                 # Try to get services again
-                cursor = services_collection.find({})
+                cursor = services_collection.find({}, SAMPLE_SERVICE_PROJECTION)
                 all_services = await cursor.to_list(length=None)
                 active_services = [s for s in all_services if s.get("is_active", True)]
                 
                 for service in active_services:
                     service_name = service.get("service_name", "").strip()
                     # Skip services with empty or invalid names
-                    if not service_name or service_name.lower() == "unknown service" or service_name.lower() == "unknown":
+                    if service_name.lower() in INVALID_SERVICE_NAMES:
                         logger.info(f"🔍 Skipping sample service with invalid name: '{service_name}'")
                         continue
                         
@@ -659,7 +788,7 @@ class UserDatabase:
                 
                 logger.info(f"✅ Added {len(formatted_services)} sample services")
             
-            logger.info(f"🔍 Final formatted services: {formatted_services}")
+            logger.debug("🔍 Final formatted services: %s", formatted_services)
             return formatted_services
             
         except Exception as e:
@@ -668,8 +797,46 @@ class UserDatabase:
             logger.error(f"❌ Full traceback: {traceback.format_exc()}")
             return []
 
+    @cached(ttl=30, key_prefix="service_search")
+    async def search_services(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get active services whose name or description contains query, filtered in MongoDB with caching"""
+        try:
+            if not self._initialized:
+                await self.initialize()
+            
+            # A compiled pattern is sent as a BSON regex; build it once for both fields
+            pattern = re.compile(re.escape(query), re.IGNORECASE)
+            cursor = self.db['services'].find(
+                {
+                    "is_active": {"$ne": False},
+                    "$or": [{"name": pattern}, {"description": pattern}]
+                },
+                {"name": 1, "description": 1, "price": 1, "server_name": 1}
+            ).limit(limit)
+            
+            services = []
+            async for service in cursor:
+                service_name = service.get("name", "").strip()
+                if service_name.lower() in INVALID_SERVICE_NAMES:
+                    continue
+                
+                services.append({
+                    "id": str(service.get("_id")),
+                    "name": service_name,
+                    "description": service.get("description", "No description available"),
+                    "price": service.get("price", "₹0"),
+                    "server": service.get("server_name", "Unknown Server")
+                })
+            
+            return services
+            
+        except Exception as e:
+            logger.error(f"❌ Error searching services for '{query}': {e}")
+            return []
+
+    @cached(ttl=60, key_prefix="service")
     async def get_service_by_id(self, service_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific service by ID"""
+        """Get a specific service by ID with caching"""
         try:
             # Ensure database is initialized
             if not self._initialized:
@@ -719,11 +886,92 @@ class UserDatabase:
             logger.error(f"❌ Error fetching service by ID {service_id}: {e}")
             return None
 
+    @cached(ttl=60, key_prefix="services_by_name")
+    async def get_services_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Get the active services with this name (case-insensitive) using the name index"""
+        try:
+            if not self._initialized:
+                await self.initialize()
+            
+            cursor = self.db['services'].find(
+                {"name": name.strip(), "is_active": {"$ne": False}},
+                SERVICE_LIST_PROJECTION,
+                collation=SERVICE_NAME_COLLATION
+            )
+            return [
+                _service_summary(service)
+                async for service in cursor
+                if service.get("name", "").strip().lower() not in INVALID_SERVICE_NAMES
+            ]
+            
+        except Exception as e:
+            logger.error(f"❌ Error fetching services named {name}: {e}")
+            return []
+
+    @cached(ttl=60, key_prefix="service_variants")
+    async def get_service_and_variants(self, service_id: str) -> Optional[Dict[str, Any]]:
+        """Get a service and every active service sharing its name in one round-trip"""
+        try:
+            if not self._initialized:
+                await self.initialize()
+            
+            from bson import ObjectId
+            from bson.errors import InvalidId
+            
+            try:
+                object_id = ObjectId(service_id)
+            except (InvalidId, TypeError):
+                logger.warning(f"⚠️ Invalid service ID: {service_id}")
+                return None
+            
+            pipeline = [
+                {"$match": {"_id": object_id}},
+                {"$limit": 1},
+                # let + $expr rather than localField with a pipeline, which needs MongoDB 5.0 or newer
+                {"$lookup": {
+                    "from": "services",
+                    "let": {"name": "$name"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$name", "$$name"]}, "is_active": {"$ne": False}}},
+                        {"$project": SERVICE_LIST_PROJECTION},
+                    ],
+                    "as": "variants",
+                }},
+            ]
+            docs = await self.db['services'].aggregate(pipeline).to_list(length=1)
+            if not docs:
+                logger.warning(f"⚠️ Service not found with ID: {service_id}")
+                return None
+            
+            service = docs[0]
+            return {
+                "service": {
+                    "id": str(service.get("_id")),
+                    "name": service.get("name", "Unknown Service"),
+                    "description": service.get("description", "No description available"),
+                    "price": service.get("price", "₹0"),
+                    "server": service.get("server_name", "Unknown Server"),
+                },
+                "variants": [
+                    _service_summary(variant)
+                    for variant in service.get("variants", [])
+                    if variant.get("name", "").strip().lower() not in INVALID_SERVICE_NAMES
+                ],
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Error fetching service variants for ID {service_id}: {e}")
+            return None
+
     async def add_transaction(self, user_id: int, transaction: Dict[str, Any]):
         """Add a transaction to user's history"""
         try:
             logger.info(f"📝 Adding transaction for user {user_id}")
             
+            created_at = transaction.get("created_at")
+            if "created_at_display" not in transaction and isinstance(created_at, datetime):
+                transaction["created_at_display"] = created_at.strftime(TRANSACTION_DATE_FORMAT)
+            
             # Add transaction to user's transaction history
             result = await self.users_collection.update_one(
                 {"user_id": user_id},
@@ -732,6 +980,7 @@ class UserDatabase:
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
+            forget_user_summary(user_id)
             
             if result.modified_count > 0:
                 logger.info(f"✅ Transaction added for user {user_id}")
@@ -741,6 +990,55 @@ class UserDatabase:
         except Exception as e:
             logger.error(f"❌ Error adding transaction for user {user_id}: {e}")
 
+    async def backfill_transaction_display_dates(self) -> int:
+        """One-time migration: add created_at_display to transactions recorded before it existed"""
+        try:
+            # A marker document records that the backfill finished, so later starts skip the collection scan
+            migrations = self.db['migrations']
+            if await migrations.find_one({"_id": TRANSACTION_DATES_MIGRATION}, {"_id": 1}):
+                return 0
+            
+            updated = 0
+            skipped = 0
+            cursor = self.users_collection.find(
+                {"transaction_history": {"$elemMatch": {"created_at_display": {"$exists": False}}}},
+                {"user_id": 1, "transaction_history": 1}
+            )
+            async for user in cursor:
+                history = user.get("transaction_history", [])
+                for transaction in history:
+                    created_at = transaction.get("created_at")
+                    if "created_at_display" not in transaction:
+                        transaction["created_at_display"] = (
+                            created_at.strftime(TRANSACTION_DATE_FORMAT) if isinstance(created_at, datetime) else str(created_at or "")
+                        )
+                
+                # Only rewrite if no transaction was pushed since we read the document
+                result = await self.users_collection.update_one(
+                    {"_id": user["_id"], "transaction_history": {"$size": len(history)}},
+                    {"$set": {"transaction_history": history}}
+                )
+                updated += result.modified_count
+                if not result.matched_count:
+                    skipped += 1
+            
+            # A user whose history changed under us still lacks display dates, so leave the marker
+            # unwritten and let the next start pick them up
+            if skipped:
+                logger.warning(f"⚠️ Backfilled transaction display dates for {updated} users; {skipped} changed meanwhile and will be retried")
+                return updated
+            
+            await migrations.update_one(
+                {"_id": TRANSACTION_DATES_MIGRATION},
+                {"$set": {"completed_at": datetime.utcnow(), "updated_users": updated}},
+                upsert=True
+            )
+            logger.info(f"✅ Backfilled transaction display dates for {updated} users")
+            return updated
+        except Exception as e:
+            logger.error(f"❌ Error backfilling transaction display dates: {e}")
+            return 0
+
     async def update_user_stats(self, user_id: int, amount: float):
         """Update user statistics after purchase"""
         try:
@@ -754,6 +1052,7 @@ class UserDatabase:
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
+            forget_user_summary(user_id)
             
             if result.modified_count > 0:
                 logger.info(f"✅ Stats updated for user {user_id}")
@@ -1051,3 +1350,31 @@ class UserDatabase:
         except Exception as e:
             logger.error(f"❌ Error updating website user balance for {user_id}: {e}")
             return False
+
+def clear_service_caches():
+    """Drop every cached service lookup so the next read sees freshly synced data"""
+    for method in (
+        UserDatabase.get_services,
+        UserDatabase.search_services,
+        UserDatabase.get_service_by_id,
+        UserDatabase.get_services_by_name,
+        UserDatabase.get_service_and_variants,
+    ):
+        method.cache_clear()
+
+_user_db: Optional[UserDatabase] = None
+_user_db_lock = asyncio.Lock()
+
+async def get_user_db() -> UserDatabase:
+    """Return the shared, initialized UserDatabase"""
+    global _user_db
+    if _user_db is not None and _user_db.client is not None:
+        return _user_db
+    
+    # Concurrent first callers wait for one connection instead of each opening a client
+    async with _user_db_lock:
+        if _user_db is None or _user_db.client is None:
+            user_db = UserDatabase()
+            await user_db.initialize()
+            _user_db = user_db
+    return _user_db
@@ -7,7 +7,7 @@ from telegram.ext import ContextTypes
 import logging
 import re
 from src.config.bot_config import BotConfig
-from src.database.user_db import UserDatabase
+from src.database.user_db import get_user_db, USER_ID_PROJECTION
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +38,7 @@ async def handle_add_balance(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         
         # Add balance
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         success = await user_db.add_balance(user_id, amount)
         
@@ -80,9 +78,7 @@ async def handle_cut_balance(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         
         # Cut balance
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         success = await user_db.cut_balance(user_id, amount)
         
@@ -117,9 +113,7 @@ async def handle_transaction_history(update: Update, context: ContextTypes.DEFAU
             return
         
         # Get transaction history
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         history = await user_db.get_user_history(user_id)
         
@@ -180,9 +174,7 @@ async def handle_number_history(update: Update, context: ContextTypes.DEFAULT_TY
             return
         
         # Get number history
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         history = await user_db.get_user_history(user_id)
         
@@ -241,9 +233,7 @@ async def handle_smm_history(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         
         # Get SMM history
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         history = await user_db.get_user_history(user_id)
         
@@ -305,13 +295,13 @@ async def handle_ban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Ban user
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         success = await user_db.ban_user(user_id)
         
         if success:
+            from src.handlers.middleware import set_user_banned
+            set_user_banned(user_id, True)
             await update.message.reply_text(f"🚫 Successfully banned user {user_id}")
         else:
             await update.message.reply_text(f"❌ Failed to ban user {user_id}. User might not exist.")
@@ -342,13 +332,13 @@ async def handle_unban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Unban user
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         success = await user_db.unban_user(user_id)
         
         if success:
+            from src.handlers.middleware import set_user_banned
+            set_user_banned(user_id, False)
             await update.message.reply_text(f"✅ Successfully unbanned user {user_id}")
         else:
             await update.message.reply_text(f"❌ Failed to unban user {user_id}. User might not exist.")
@@ -377,11 +367,9 @@ async def handle_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Get all users for broadcast
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
-        users = await user_db.get_all_users()
+        users = await user_db.get_all_users(USER_ID_PROJECTION)
         
         if not users:
             await update.message.reply_text("📢 No users found to broadcast to.")
@@ -428,13 +416,10 @@ async def handle_delete_all_data(update: Update, context: ContextTypes.DEFAULT_T
         # Check if this is a confirmation
         if context.args and context.args[0].lower() == "confirm":
             # User confirmed deletion
-            user_db = UserDatabase()
-            if not hasattr(user_db, 'client') or user_db.client is None:
-                await user_db.initialize()
+            user_db = await get_user_db()
             
             # Get user count before deletion
-            users = await user_db.get_all_users()
-            user_count = len(users)
+            user_count = await user_db.users_collection.count_documents({})
             
             # Clear all data
             cleared_count = await user_db.clear_all_data()
@@ -472,13 +457,19 @@ async def handle_sync_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🔄 Starting data synchronization with website...")
         
         # Import service database for sync
-        from src.database.service_db import ServiceDatabase
-        service_db = ServiceDatabase()
+        from src.database.service_db import get_service_db
+        service_db = await get_service_db()
         
         # Perform complete sync
         sync_result = await service_db.sync_all_data_with_website()
         
         if sync_result["success"]:
+            from src.handlers.service_handler import clear_servers_keyboard_cache
+            from src.handlers.inline_handler import clear_services_cache
+            from src.database.user_db import clear_service_caches
+            clear_servers_keyboard_cache()
+            clear_services_cache()
+            clear_service_caches()
             message = "✅ Data synchronization completed!\n\n"
             message += f"📊 Users: {sync_result['users']['synced_users']}/{sync_result['users']['total_users']} synced\n"
             message += f"🔧 Services: {sync_result['services']['synced_services']}/{sync_result['services']['total_services']} synced\n"
@@ -506,9 +497,7 @@ async def handle_sync_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🔄 Starting user data synchronization...")
         
         # Perform user sync
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         sync_result = await user_db.sync_all_users_with_website()
         
@@ -538,13 +527,19 @@ async def handle_sync_services(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("🔄 Starting service data synchronization...")
         
         # Import service database for sync
-        from src.database.service_db import ServiceDatabase
-        service_db = ServiceDatabase()
+        from src.database.service_db import get_service_db
+        service_db = await get_service_db()
         
         # Perform service sync
         sync_result = await service_db.sync_services_with_website()
         
         if sync_result["success"]:
+            from src.handlers.service_handler import clear_servers_keyboard_cache
+            from src.handlers.inline_handler import clear_services_cache
+            from src.database.user_db import clear_service_caches
+            clear_servers_keyboard_cache()
+            clear_services_cache()
+            clear_service_caches()
             message = "✅ Service data synchronization completed!\n\n"
             message += f"🔧 Total services: {sync_result['total_services']}\n"
             message += f"✅ Synced: {sync_result['synced_services']}\n"
@@ -570,15 +565,13 @@ async def handle_check_sync_status(update: Update, context: ContextTypes.DEFAULT
         await update.message.reply_text("🔍 Checking sync status...")
         
         # Get counts from bot database
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         bot_users_count = await user_db.users_collection.count_documents({})
         
         # Import service database
-        from src.database.service_db import ServiceDatabase
-        service_db = ServiceDatabase()
+        from src.database.service_db import get_service_db
+        service_db = await get_service_db()
         
         bot_services_count = await service_db.services_collection.count_documents({})
         bot_servers_count = await service_db.servers_collection.count_documents({})
@@ -4,13 +4,110 @@ Callback Query Handler
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+import asyncio
 import logging
+import re
 from datetime import datetime
+from functools import lru_cache
 
+from src.utils.user_task_queue import submit_user_task
+from src.utils.callback_data import unpack_object_id
 from src.utils.keyboard_utils import create_main_keyboard, create_back_keyboard, create_services_keyboard, create_payment_keyboard, create_balance_keyboard, create_transactions_keyboard
 
 logger = logging.getLogger(__name__)
 
+# Transaction page buttons carry a keyset cursor; matching it whole validates and extracts it in one step
+_TRANSACTIONS_CURSOR_RE = re.compile(r'transactions_before_(\d+)\Z')
+_HISTORY_CURSOR_RE = re.compile(r'history_transactions_before_(\d+)\Z')
+
+# Static admin "coming soon" screens, built once instead of per callback
+_ADMIN_BACK_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]])
+_ADMIN_DASHBOARD_MSG = "📊 Admin Dashboard\n\nThis feature is coming soon!"
+_ADMIN_USERS_MSG = "👥 Users Management\n\nThis feature is coming soon!"
+_ADMIN_AUTO_IMPORT_MSG = "🔄 Auto Import API Services\n\nThis feature is coming soon!"
+_ADMIN_ADD_SERVER_MSG = "🖥️ Add Server\n\nThis feature is coming soon!"
+_ADMIN_ADD_SERVICE_MSG = "📦 Add Service\n\nThis feature is coming soon!"
+_ADMIN_CONNECT_API_MSG = "🔗 Connect API\n\nThis feature is coming soon!"
+_ADMIN_BOT_SETTINGS_MSG = "⚙️ Edit Bot Settings\n\nThis feature is coming soon!"
+_ADMIN_VIEW_SERVICES_MSG = "👀 View My Services\n\nThis feature is coming soon!"
+_ADMIN_ADD_PROMOCODE_MSG = "🎫 Add Promocode\n\nThis feature is coming soon!"
+_ADMIN_ADD_TEMP_MAIL_MSG = "📧 Add Temp Mail\n\nThis feature is coming soon!"
+_ADMIN_ADD_EMAIL_MSG = "📮 Add Email\n\nThis feature is coming soon!"
+_ADMIN_SMM_SERVICES_MSG = "📈 SMM Services\n\nThis feature is coming soon!"
+_ADMIN_MANUAL_PAYMENTS_MSG = "💳 View Manual Payments\n\nThis feature is coming soon!"
+
+_NUMBER_HISTORY_MSG = "🛒 Number History\n\n🍒 You don't have any recent number history."
+_NUMBER_HISTORY_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("« Back", callback_data="history")]])
+
+_ADMIN_COMMANDS_MSG = (
+    "Admin Commands:\n\n"
+    "👉 Add Balance - /add 1980442239 100\n"
+    "👉 Cut Balance - /cut 1980442239 100\n"
+    "👉 User Transaction History - /trnx 1980442239\n"
+    "👉 User Number History - /nums 1980442239\n"
+    "👉 User SMM service History - /smm_history 1980442239\n"
+    "👉 Ban User - /ban 1980442239\n"
+    "👉 Unban User - /unban 1980442239\n"
+    "👉 Broadcast a message - /broadcast hello everyone\n\n"
+    "⚠️ Remember to replace 1980442239 with actual user id."
+)
+
+@lru_cache(maxsize=None)
+def _get_bot_config():
+    """Load the bot config once; env is read at first use, after dotenv has run"""
+    from src.config.bot_config import BotConfig
+    return BotConfig()
+
+@lru_cache(maxsize=None)
+def _get_admin_ids() -> frozenset:
+    """Admin user IDs allowed to use admin callbacks"""
+    admin_id = _get_bot_config().ADMIN_USER_ID
+    return frozenset({int(admin_id)}) if admin_id and admin_id.isdigit() else frozenset()
+
+@lru_cache(maxsize=None)
+def _build_admin_panel_keyboard(backend_url: str) -> InlineKeyboardMarkup:
+    """Build the admin panel keyboard; it only depends on the backend URL"""
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Dashboard", web_app={"url": f"{backend_url}/admin-dashboard"}),
+            InlineKeyboardButton("Users", callback_data="admin_users")
+        ],
+        [InlineKeyboardButton("Auto Import API Services", callback_data="admin_auto_import")],
+        [
+            InlineKeyboardButton("Add Server", web_app={"url": f"{backend_url}/add-server"}),
+            InlineKeyboardButton("Add Service", web_app={"url": f"{backend_url}/add-service"})
+        ],
+        [
+            InlineKeyboardButton("Connect API", web_app={"url": f"{backend_url}/connect-api"}),
+            InlineKeyboardButton("Edit Bot Settings", web_app={"url": f"{backend_url}/bot-settings"})
+        ],
+        [InlineKeyboardButton("View My Services", web_app={"url": f"{backend_url}/my-services"})],
+        [InlineKeyboardButton("QR Code", web_app={"url": f"{backend_url}/qr-code"})],
+        [InlineKeyboardButton("Add Promocode", callback_data="admin_add_promocode")],
+        [InlineKeyboardButton("View Manual Payments", callback_data="admin_manual_payments")]
+    ])
+
+_TRANSACTION_TEMPLATE = (
+    "✉️ {reason}\n"
+    "<b>{amount_text}</b>: {amount} 💰\n"
+    "<b>Closing balance</b>: {closing_balance} 💎\n"
+    "📅 Created On: {date}"
+)
+
+def format_transactions_message(header: str, transactions: list) -> str:
+    """Render a page of transactions below a header"""
+    parts = [header]
+    for transaction in transactions:
+        parts.append(_TRANSACTION_TEMPLATE.format(
+            reason=transaction.get("reason", "No description"),
+            amount_text="Amount credited" if transaction.get("type") == "credit" else "Amount debited",
+            amount=transaction.get("amount", 0.0),
+            closing_balance=transaction.get("closing_balance", 0.0),
+            date=transaction.get("created_at_display") or str(transaction.get("created_at", ""))
+        ))
+    parts.append("")
+    return "\n\n".join(parts)
+
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle callback queries from inline keyboards"""
     try:
@@ -55,25 +152,27 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif callback_data == "back_to_main":
             await handle_back_to_main(update, context)
         elif callback_data == "transactions":
-            await handle_transactions(update, context)
-        elif callback_data.startswith("transactions_page_"):
-            # Handle transaction pagination
-            try:
-                page = int(callback_data.split("_")[-1])
-                await handle_transaction_page(update, context, page)
-            except ValueError:
-                await handle_transactions(update, context)
+            submit_user_task(user.id, lambda: handle_transactions(update, context))
+        elif callback_data.startswith("transactions_before_"):
+            # Handle transaction pagination in the background; the callback is already answered
+            match = _TRANSACTIONS_CURSOR_RE.match(callback_data)
+            if match:
+                before = int(match.group(1))
+                submit_user_task(user.id, lambda: handle_transaction_page(update, context, before))
+            else:
+                submit_user_task(user.id, lambda: handle_transactions(update, context))
         elif callback_data.startswith("server_"):
             await handle_server_selection(update, context)
-        elif callback_data.startswith("history_transactions_page_"):
-            # Handle history transaction pagination
-            try:
-                page = int(callback_data.split("_")[-1])
-                await handle_history_transaction_page(update, context, page)
-            except ValueError:
-                await handle_transaction_history(update, context)
+        elif callback_data.startswith("history_transactions_before_"):
+            # Handle history transaction pagination in the background
+            match = _HISTORY_CURSOR_RE.match(callback_data)
+            if match:
+                before = int(match.group(1))
+                submit_user_task(user.id, lambda: handle_history_transaction_page(update, context, before))
+            else:
+                submit_user_task(user.id, lambda: handle_transaction_history(update, context))
         elif callback_data == "transaction_history":
-            await handle_transaction_history(update, context)
+            submit_user_task(user.id, lambda: handle_transaction_history(update, context))
         elif callback_data == "number_history":
             await handle_number_history(update, context)
         # Service selection callback handlers
@@ -100,6 +199,19 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except:
             pass
 
+# Service descriptions are cut to this length so the list buttons stay readable
+SERVICE_BUTTON_DESCRIPTION_LENGTH = 50
+
+def _service_list_button(service_name: str, variant: dict, fallback_id: int) -> InlineKeyboardButton:
+    """Build the services-list button for one service from one of its variants"""
+    description = variant.get('description', 'No description available')
+    if len(description) > SERVICE_BUTTON_DESCRIPTION_LENGTH:
+        description = description[:SERVICE_BUTTON_DESCRIPTION_LENGTH] + "..."
+    return InlineKeyboardButton(
+        f"📦 {service_name}\n{description}",
+        callback_data=f"service_{variant.get('id', str(fallback_id))}"
+    )
+
 async def handle_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle services button - Show services list"""
     query = update.callback_query
@@ -115,20 +227,14 @@ async def handle_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Send loading message
         await query.edit_message_text(
             text="🔍 Loading services...",
-            reply_markup=None
+            reply_markup=None,
+            disable_web_page_preview=True
         )
         logger.info("✅ Loading message sent")
         
         # Get services from database
-        logger.info("📦 Initializing UserDatabase...")
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            logger.info("📦 Database not initialized, initializing now...")
-            await user_db.initialize()
-            logger.info("✅ Database initialized")
-        else:
-            logger.info("✅ Database already initialized")
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         logger.info("🔍 Fetching services from database...")
         services = await user_db.get_services()
@@ -140,7 +246,8 @@ async def handle_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info("📤 Sending 'no services' message to user")
             await query.edit_message_text(
                 text="📦 No services available at the moment.\n\nPlease check back later!",
-                reply_markup=create_back_keyboard()
+                reply_markup=create_back_keyboard(),
+                disable_web_page_preview=True
             )
             logger.info("✅ 'No services' message sent")
             return
@@ -150,56 +257,20 @@ async def handle_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Group services by name to show unique services
         service_groups = {}
         for service in services:
-            service_name = service.get('name', 'Unknown')
-            if service_name not in service_groups:
-                service_groups[service_name] = []
-            service_groups[service_name].append(service)
+            service_groups.setdefault(service.get('name', 'Unknown'), []).append(service)
         
-        logger.info(f"📋 Found {len(service_groups)} unique services:")
-        for service_name, variants in service_groups.items():
-            logger.info(f"  - {service_name}: {len(variants)} variants")
+        logger.info(f"📋 Found {len(service_groups)} unique services")
         
         # Create services list message
         message = f"📦 <b>Available Services</b>\n\n"
         message += f"✅ Found {len(service_groups)} services\n\n"
         message += "🔽 <b>Choose a service below:</b>\n\n"
         
-        logger.info(f"📝 Message to send: {message}")
-        
-        # Create interactive keyboard with service buttons
-        keyboard = []
-        
-        logger.info("🔧 Creating service buttons:")
-        # Add service buttons for unique services
-        for i, (service_name, variants) in enumerate(service_groups.items(), 1):
-            # Use the first variant for description and ID
-            first_variant = variants[0]
-            service_description = first_variant.get('description', 'No description available')
-            service_id = first_variant.get('id', str(i))
-            service_server = first_variant.get('server_name', 'Unknown Server')
-            
-            logger.info(f"🔧 Creating button for service: {service_name} (ID: {service_id}) on server: {service_server}")
-            
-            # Create button text with name and description only (no price)
-            # Limit description length to avoid button text overflow
-            max_desc_length = 50
-            if len(service_description) > max_desc_length:
-                service_description = service_description[:max_desc_length] + "..."
-            
-            button_text = f"📦 {service_name}\n{service_description}"
-            
-            callback_data = f"service_{service_id}"
-            logger.info(f"🔧 Creating service button: {button_text}")
-            logger.info(f"🔧 Callback data: {callback_data}")
-            
-            keyboard.append([
-                InlineKeyboardButton(
-                    button_text, 
-                    callback_data=callback_data
-                )
-            ])
-        
-        # Add back button
+        # One button per unique service, described by its first variant, then the back button
+        keyboard = [
+            [_service_list_button(service_name, variants[0], i)]
+            for i, (service_name, variants) in enumerate(service_groups.items(), 1)
+        ]
         keyboard.append([InlineKeyboardButton("« Back", callback_data="back_to_main")])
         
         logger.info(f"🎯 Created keyboard with {len(keyboard)-1} service buttons")
@@ -212,7 +283,8 @@ async def handle_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
         logger.info("✅ Services message sent successfully!")
@@ -222,7 +294,8 @@ async def handle_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"❌ Error in handle_services: {e}")
         await query.edit_message_text(
             text="❌ Error loading services. Please try again later.",
-            reply_markup=create_back_keyboard()
+            reply_markup=create_back_keyboard(),
+            disable_web_page_preview=True
         )
 
 async def handle_service_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -238,34 +311,29 @@ async def handle_service_selection(update: Update, context: ContextTypes.DEFAULT
         
         # Extract service ID from callback data
         callback_data = query.data
-        service_id = callback_data.replace("service_", "")
+        service_id = callback_data[len("service_"):]
         
         logger.info(f"🎯 Raw callback data: {callback_data}")
         logger.info(f"🎯 Extracted service ID: {service_id}")
         logger.info(f"🎯 Service ID type: {type(service_id)}")
         
         # Get service details from database
-        from src.database.user_db import UserDatabase
-        from src.database.service_db import ServiceDatabase
-        
-        logger.info("📦 Initializing databases...")
-        user_db = UserDatabase()
-        service_db = ServiceDatabase()
-        
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            logger.info("📦 Initializing UserDatabase...")
-            await user_db.initialize()
-        await service_db.initialize()
-        logger.info("✅ Databases initialized")
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         logger.info(f"🔍 Fetching service details for ID: {service_id}")
-        service = await user_db.get_service_by_id(service_id)
+        # The service lookup and the full listing are independent; fetch them together
+        service, all_services = await asyncio.gather(
+            user_db.get_service_by_id(service_id),
+            user_db.get_services(),
+        )
         
         if not service:
             logger.error(f"❌ Service not found with ID: {service_id}")
             await query.edit_message_text(
                 text="❌ Service not found. Please try again.",
-                reply_markup=create_back_keyboard()
+                reply_markup=create_back_keyboard(),
+                disable_web_page_preview=True
             )
             return
         
@@ -274,34 +342,11 @@ async def handle_service_selection(update: Update, context: ContextTypes.DEFAULT
         logger.info(f"🔍 Service details: {service}")
         
         # Get all services with the same name but different servers
-        logger.info("📦 Fetching all services...")
-        all_services = await user_db.get_services()
         logger.info(f"📦 Total services fetched: {len(all_services)}")
         
-        service_variants = []
-        
-        logger.info(f"🔍 Looking for service variants with name: {service_name}")
-        logger.info(f"🔍 Total services available: {len(all_services)}")
-        
-        # Debug: Show all services
-        logger.info("📋 All services in database:")
-        for i, svc in enumerate(all_services):
-            svc_name = svc.get('name', 'Unknown')
-            svc_server = svc.get('server', 'Unknown Server')
-            svc_id = svc.get('id', 'NO_ID')
-            logger.info(f"  {i+1}. {svc_name} (ID: {svc_id}) on {svc_server}")
-        
-        for svc in all_services:
-            svc_name = svc.get('name', '')
-            svc_server = svc.get('server', 'Unknown Server')
-            logger.info(f"🔍 Checking service: '{svc_name}' vs '{service_name}'")
-            logger.info(f"🔍 Service server: {svc_server}")
-            
-            if svc_name.upper() == service_name.upper():
-                service_variants.append(svc)
-                logger.info(f"✅ Added service variant: {svc_name} on server: {svc_server}")
-            else:
-                logger.info(f"❌ Skipped: {svc_name} (name mismatch)")
+        # Variants are the services sharing this name on other servers; upper-case the target once
+        service_name_upper = service_name.upper()
+        service_variants = [svc for svc in all_services if svc.get('name', '').upper() == service_name_upper]
         
         # Store the original service ID and name for back navigation
         original_service_id = service_id
@@ -313,42 +358,19 @@ async def handle_service_selection(update: Update, context: ContextTypes.DEFAULT
             logger.warning(f"⚠️ No server variants found for service {service_name}")
             await query.edit_message_text(
                 text=f"❌ No servers available for {service_name}.\n\nPlease try another service or contact admin.",
-                reply_markup=create_back_keyboard()
+                reply_markup=create_back_keyboard(),
+                disable_web_page_preview=True
             )
             return
         
-        # Create message showing selected service
-        message = f"➤ Selected Service : {service_name}\n"
-        message += "↓ Choose Server Below\n\n"
-        
-        logger.info(f"📝 Message to send: {message}")
-        
-        # Directly execute the show_server command
-        command = f"/show_server {service_name.upper()}"
-        
-        logger.info(f"🔧 Directly executing: {command}")
-        
-        # Create fake context with the service name as argument
-        fake_context = type('Context', (), {
-            'args': [service_name.upper()],
-            'bot': context.bot
-        })()
-        
-        # Create fake update
-        fake_update = type('Update', (), {
-            'message': type('Message', (), {
-                'reply_text': lambda text, **kwargs: query.edit_message_text(text=text, **kwargs),
-                'text': command,
-                'chat': {'id': update.effective_chat.id},
-                'from_user': update.effective_user
-            })(),
-            'effective_user': update.effective_user,
-            'effective_chat': update.effective_chat
-        })()
-        
-        # Import and call the show_server handler directly
-        from src.handlers.service_handler import handle_show_server
-        await handle_show_server(fake_update, fake_context)
+        # Render the same server picker /show_server would, in place of the services list
+        from src.handlers.service_handler import render_servers_keyboard
+        text, reply_markup = render_servers_keyboard(service_name_upper, service_variants)
+        await query.edit_message_text(
+            text=text,
+            reply_markup=reply_markup,
+            disable_web_page_preview=True
+        )
         
         logger.info("✅ Service selection handler completed successfully")
         logger.info("=" * 60)
@@ -362,7 +384,8 @@ async def handle_service_selection(update: Update, context: ContextTypes.DEFAULT
         logger.info("📤 Sending error message to user...")
         await query.edit_message_text(
             text="❌ Error loading service details. Please try again later.",
-            reply_markup=create_back_keyboard()
+            reply_markup=create_back_keyboard(),
+            disable_web_page_preview=True
         )
         logger.info("✅ Error message sent")
 
@@ -376,26 +399,28 @@ async def handle_server_selection(update: Update, context: ContextTypes.DEFAULT_
         
         # Extract service variant ID from callback data
         callback_data = query.data
-        # Format: server_{service_variant_id}
-        service_variant_id = callback_data.replace("server_", "")
+        # Format: server_{service_variant_id}, with ObjectIds packed by render_servers_keyboard
+        service_variant_id = unpack_object_id(callback_data[len("server_"):])
         
         logger.info(f"🎯 Selected service variant ID: {service_variant_id}")
         
         # Get service variant details from database
-        from src.database.user_db import UserDatabase
+        from src.database.user_db import get_user_db
         
-        user_db = UserDatabase()
+        user_db = await get_user_db()
         
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
-        
-        # Get service variant details
-        service_variant = await user_db.get_service_by_id(service_variant_id)
+        # The variant and the balance are independent reads, so fetch them in one concurrent round-trip.
+        # The balance is a money decision, so it is read uncached rather than from a cached user document
+        service_variant, user_balance = await asyncio.gather(
+            user_db.get_service_by_id(service_variant_id),
+            user_db.get_user_balance(user.id)
+        )
         if not service_variant:
             logger.error(f"❌ Service variant not found with ID: {service_variant_id}")
             await query.edit_message_text(
                 text="❌ Service not found. Please try again.",
-                reply_markup=create_back_keyboard()
+                reply_markup=create_back_keyboard(),
+                disable_web_page_preview=True
             )
             return
         
@@ -406,14 +431,6 @@ async def handle_server_selection(update: Update, context: ContextTypes.DEFAULT_
         
         logger.info(f"✅ Found service: {service_name}, server: {server_name}")
         
-        # Get user data to check balance
-        user_data = await user_db.get_or_create_user(
-            user_id=user.id,
-            username=user.username,
-            first_name=user.first_name
-        )
-        
-        user_balance = user_data.get("balance", 0.0)
         service_price = float(server_price.replace('₹', '').replace(',', ''))
         
         logger.info(f"💰 User balance: {user_balance}, Service price: {service_price}")
@@ -455,7 +472,8 @@ async def handle_server_selection(update: Update, context: ContextTypes.DEFAULT_
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -465,7 +483,8 @@ async def handle_server_selection(update: Update, context: ContextTypes.DEFAULT_
         
         await query.edit_message_text(
             text="❌ Error loading server details. Please try again later.",
-            reply_markup=create_back_keyboard()
+            reply_markup=create_back_keyboard(),
+            disable_web_page_preview=True
         )
 
 async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -479,17 +498,14 @@ async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_
         # Extract service variant ID from callback data
         callback_data = query.data
         # Format: purchase_{service_variant_id}
-        service_variant_id = callback_data.replace("purchase_", "")
+        service_variant_id = callback_data[len("purchase_"):]
         
         logger.info(f"🎯 Purchase service variant ID: {service_variant_id}")
         
         # Get service variant details from database
-        from src.database.user_db import UserDatabase
+        from src.database.user_db import get_user_db
         
-        user_db = UserDatabase()
-        
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        user_db = await get_user_db()
         
         # Get service variant details
         service_variant = await user_db.get_service_by_id(service_variant_id)
@@ -497,7 +513,8 @@ async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_
             logger.error(f"❌ Service variant not found for purchase: {service_variant_id}")
             await query.edit_message_text(
                 text="❌ Service not found. Please try again.",
-                reply_markup=create_back_keyboard()
+                reply_markup=create_back_keyboard(),
+                disable_web_page_preview=True
             )
             return
         
@@ -507,14 +524,8 @@ async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_
         
         logger.info(f"✅ Found service for purchase: {service_name} on server: {server_name}")
         
-        # Get user data to check balance
-        user_data = await user_db.get_or_create_user(
-            user_id=user.id,
-            username=user.username,
-            first_name=user.first_name
-        )
-        
-        user_balance = user_data.get("balance", 0.0)
+        # Money decision, so read the balance uncached rather than from a cached user document
+        user_balance = await user_db.get_user_balance(user.id)
         service_price = float(server_price.replace('₹', '').replace(',', ''))
         
         logger.info(f"💰 Purchase check - User balance: {user_balance}, Service price: {service_price}")
@@ -537,7 +548,8 @@ async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_
             await query.edit_message_text(
                 text=message,
                 reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode='HTML'
+                parse_mode='HTML',
+                disable_web_page_preview=True
             )
             return
         
@@ -585,7 +597,8 @@ async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -595,7 +608,8 @@ async def handle_purchase_service(update: Update, context: ContextTypes.DEFAULT_
         
         await query.edit_message_text(
             text="❌ Error processing purchase. Please try again later.",
-            reply_markup=create_back_keyboard()
+            reply_markup=create_back_keyboard(),
+            disable_web_page_preview=True
         )
 
 async def handle_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -605,10 +619,8 @@ async def handle_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Get user data from database
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         user_data = await user_db.get_or_create_user(
             user_id=user.id,
@@ -635,7 +647,8 @@ async def handle_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text(
             text=message,
             reply_markup=keyboard,
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -651,7 +664,8 @@ async def handle_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text(
             text=message,
             reply_markup=keyboard,
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
 
 async def handle_recharge(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -670,7 +684,8 @@ async def handle_recharge(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text(
         text=message,
         reply_markup=keyboard,
-        parse_mode='HTML'
+        parse_mode='HTML',
+        disable_web_page_preview=True
     )
 
 async def handle_promocode(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -688,7 +703,8 @@ async def handle_promocode(update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id=query.message.chat_id,
         text=message,
         reply_markup=keyboard,
-        parse_mode='HTML'
+        parse_mode='HTML',
+        disable_web_page_preview=True
     )
     
     # Answer the callback query
@@ -701,10 +717,8 @@ async def handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Get user data from database
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         user_data = await user_db.get_or_create_user(
             user_id=user.id,
@@ -737,7 +751,8 @@ async def handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text(
             text=message,
             reply_markup=keyboard,
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -762,7 +777,8 @@ async def handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text(
             text=message,
             reply_markup=keyboard,
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
 
 async def handle_support(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -786,7 +802,8 @@ async def handle_support(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text(
         text=message,
         reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode='HTML'
+        parse_mode='HTML',
+        disable_web_page_preview=True
     )
 
 async def handle_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -809,7 +826,8 @@ async def handle_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text(
         text=message,
         reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode='HTML'
+        parse_mode='HTML',
+        disable_web_page_preview=True
     )
 
 async def handle_back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -834,63 +852,41 @@ async def handle_back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.edit_message_text(
         text=welcome_message,
         reply_markup=keyboard,
-        parse_mode='HTML'
+        parse_mode='HTML',
+        disable_web_page_preview=True
     )
 
 async def handle_transactions(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle transactions button - show first page"""
-    await handle_transaction_page(update, context, page=1)
+    await handle_transaction_page(update, context)
 
-async def handle_transaction_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 1):
+async def handle_transaction_page(update: Update, context: ContextTypes.DEFAULT_TYPE, before: int = None):
     """Handle transaction page display with pagination"""
     query = update.callback_query
     await query.answer()
     
     try:
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         # Get user transactions with pagination
-        result = await user_db.get_user_transactions(query.from_user.id, page=page, per_page=4)
+        result = await user_db.get_user_transactions(query.from_user.id, before=before, per_page=4)
         
         if not result or result["total_transactions"] == 0:
             await query.edit_message_text(
                 text="🙈 You don't have any transaction history",
                 reply_markup=InlineKeyboardMarkup([
                     [InlineKeyboardButton("« Back", callback_data="balance")]
-                ])
+                ]),
+                disable_web_page_preview=True
             )
             return
         
         # Build transaction message
-        message = f"📩 Page {result['current_page']} of {result['total_pages']}\n\n"
-        
-        for i, transaction in enumerate(result["transactions"], 1):
-            # Format the transaction
-            tx_type = transaction.get("type", "unknown")
-            reason = transaction.get("reason", "No description")
-            amount = transaction.get("amount", 0.0)
-            closing_balance = transaction.get("closing_balance", 0.0)
-            created_at = transaction.get("created_at")
-            
-            # Format date
-            if isinstance(created_at, str):
-                date_str = created_at
-            else:
-                try:
-                    date_str = created_at.strftime("%-m/%-d/%Y, %-I:%M:%S %p")
-                except:
-                    date_str = str(created_at)
-            
-            # Format amount display
-            amount_text = f"Amount credited" if tx_type == "credit" else f"Amount debited"
-            
-            message += f"✉️ {reason}\n"
-            message += f"<b>{amount_text}</b>: {amount} 💰\n"
-            message += f"<b>Closing balance</b>: {closing_balance} 💎\n"
-            message += f"📅 Created On: {date_str}\n\n"
+        message = format_transactions_message(
+            f"📩 Page {result['current_page']} of {result['total_pages']}",
+            result["transactions"]
+        )
         
         # Create pagination keyboard
         keyboard = []
@@ -898,10 +894,10 @@ async def handle_transaction_page(update: Update, context: ContextTypes.DEFAULT_
         # Navigation buttons (only if multiple pages)
         if result["total_pages"] > 1:
             nav_row = []
-            if result["current_page"] > 1:
-                nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"transactions_page_{result['current_page'] - 1}"))
-            if result["current_page"] < result["total_pages"]:
-                nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"transactions_page_{result['current_page'] + 1}"))
+            if result["prev_before"] is not None:
+                nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"transactions_before_{result['prev_before']}"))
+            if result["next_before"] is not None:
+                nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"transactions_before_{result['next_before']}"))
             if nav_row:
                 keyboard.append(nav_row)
         
@@ -911,7 +907,8 @@ async def handle_transaction_page(update: Update, context: ContextTypes.DEFAULT_
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -920,59 +917,37 @@ async def handle_transaction_page(update: Update, context: ContextTypes.DEFAULT_
             text="❌ Error loading transaction history",
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("« Back", callback_data="balance")]
-            ])
+            ]),
+            disable_web_page_preview=True
         )
 
-async def handle_history_transaction_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 1):
+async def handle_history_transaction_page(update: Update, context: ContextTypes.DEFAULT_TYPE, before: int = None):
     """Handle history transaction page display with pagination"""
     query = update.callback_query
     await query.answer()
     
     try:
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         # Get user transactions with pagination
-        result = await user_db.get_user_transactions(query.from_user.id, page=page, per_page=4)
+        result = await user_db.get_user_transactions(query.from_user.id, before=before, per_page=4)
         
         if not result or result["total_transactions"] == 0:
             await query.edit_message_text(
                 text="💎 Transaction History\n\n🙈 You don't have any transaction history",
                 reply_markup=InlineKeyboardMarkup([
                     [InlineKeyboardButton("« Back", callback_data="history")]
-                ])
+                ]),
+                disable_web_page_preview=True
             )
             return
         
         # Build transaction message
-        message = f"💎 Transaction History\n📩 Page {result['current_page']} of {result['total_pages']}\n\n"
-        
-        for i, transaction in enumerate(result["transactions"], 1):
-            # Format the transaction
-            tx_type = transaction.get("type", "unknown")
-            reason = transaction.get("reason", "No description")
-            amount = transaction.get("amount", 0.0)
-            closing_balance = transaction.get("closing_balance", 0.0)
-            created_at = transaction.get("created_at")
-            
-            # Format date
-            if isinstance(created_at, str):
-                date_str = created_at
-            else:
-                try:
-                    date_str = created_at.strftime("%-m/%-d/%Y, %-I:%M:%S %p")
-                except:
-                    date_str = str(created_at)
-            
-            # Format amount display
-            amount_text = f"Amount credited" if tx_type == "credit" else f"Amount debited"
-            
-            message += f"✉️ {reason}\n"
-            message += f"<b>{amount_text}</b>: {amount} 💰\n"
-            message += f"<b>Closing balance</b>: {closing_balance} 💎\n"
-            message += f"📅 Created On: {date_str}\n\n"
+        message = format_transactions_message(
+            f"💎 Transaction History\n📩 Page {result['current_page']} of {result['total_pages']}",
+            result["transactions"]
+        )
         
         # Create pagination keyboard
         keyboard = []
@@ -980,10 +955,10 @@ async def handle_history_transaction_page(update: Update, context: ContextTypes.
         # Navigation buttons (only if multiple pages)
         if result["total_pages"] > 1:
             nav_row = []
-            if result["current_page"] > 1:
-                nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"history_transactions_page_{result['current_page'] - 1}"))
-            if result["current_page"] < result["total_pages"]:
-                nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"history_transactions_page_{result['current_page'] + 1}"))
+            if result["prev_before"] is not None:
+                nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"history_transactions_before_{result['prev_before']}"))
+            if result["next_before"] is not None:
+                nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"history_transactions_before_{result['next_before']}"))
             if nav_row:
                 keyboard.append(nav_row)
         
@@ -993,7 +968,8 @@ async def handle_history_transaction_page(update: Update, context: ContextTypes.
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1002,7 +978,8 @@ async def handle_history_transaction_page(update: Update, context: ContextTypes.
             text="💎 Transaction History\n\n❌ Error loading transaction history",
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("« Back", callback_data="history")]
-            ])
+            ]),
+            disable_web_page_preview=True
         )
 
 async def handle_promocode_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1015,32 +992,21 @@ async def handle_promocode_reply(update: Update, context: ContextTypes.DEFAULT_T
         # Send processing message
         processing_msg = await context.bot.send_message(
             chat_id=chat_id,
-            text="⏳ Processing your promocode..."
+            text="⏳ Processing your promocode...",
+            disable_web_page_preview=True,
+            disable_notification=True
         )
         
-        # Wait 2 seconds as requested
-        import asyncio
-        await asyncio.sleep(2)
-        
         # Check and use promocode from database
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         # Use the promocode
         result = await user_db.use_promocode(promocode, user.id)
         
         if result["valid"]:
-            # Get updated user balance for success message
-            from src.database.user_db import UserDatabase
-            user_db = UserDatabase()
-            if not hasattr(user_db, 'client') or user_db.client is None:
-                await user_db.initialize()
-            
-            # Get user's current balance
-            user = await user_db.users_collection.find_one({"user_id": user.id})
-            current_balance = user.get("balance", 0.0) if user else 0.0
+            # use_promocode returns the balance it just wrote
+            current_balance = result.get("closing_balance", 0.0)
             
             # Exciting success message with party emojis
             success_message = f"""🎉🎊🎉 HURAYYYYYYY! 🎉🎊🎉
@@ -1053,16 +1019,16 @@ async def handle_promocode_reply(update: Update, context: ContextTypes.DEFAULT_T
 
 ✨ Enjoy your instant credit! ✨"""
             
-            await context.bot.send_message(
-                chat_id=chat_id,
+            await processing_msg.edit_text(
                 text=success_message,
-                parse_mode='HTML'
+                parse_mode='HTML',
+                disable_web_page_preview=True
             )
         else:
             # Error message
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"❌ {result['message']}"
+            await processing_msg.edit_text(
+                text=f"❌ {result['message']}",
+                disable_web_page_preview=True
             )
         
     except Exception as e:
@@ -1070,7 +1036,8 @@ async def handle_promocode_reply(update: Update, context: ContextTypes.DEFAULT_T
         try:
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
-                text="❌ Something went wrong processing your promocode."
+                text="❌ Something went wrong processing your promocode.",
+                disable_web_page_preview=True
             )
         except:
             pass
@@ -1080,13 +1047,11 @@ async def handle_transaction_history(update: Update, context: ContextTypes.DEFAU
     query = update.callback_query
     
     try:
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            await user_db.initialize()
+        from src.database.user_db import get_user_db
+        user_db = await get_user_db()
         
         # Get user transactions with pagination
-        result = await user_db.get_user_transactions(query.from_user.id, page=1, per_page=4)
+        result = await user_db.get_user_transactions(query.from_user.id, per_page=4)
         
         if not result or result["total_transactions"] == 0:
             message = "💎 Transaction History\n\n🙈 You don't have any transaction history"
@@ -1095,32 +1060,10 @@ async def handle_transaction_history(update: Update, context: ContextTypes.DEFAU
             ]
         else:
             # Build transaction message
-            message = f"💎 Transaction History\n📩 Page {result['current_page']} of {result['total_pages']}\n\n"
-            
-            for i, transaction in enumerate(result["transactions"], 1):
-                # Format the transaction
-                tx_type = transaction.get("type", "unknown")
-                reason = transaction.get("reason", "No description")
-                amount = transaction.get("amount", 0.0)
-                closing_balance = transaction.get("closing_balance", 0.0)
-                created_at = transaction.get("created_at")
-                
-                # Format date
-                if isinstance(created_at, str):
-                    date_str = created_at
-                else:
-                    try:
-                        date_str = created_at.strftime("%-m/%-d/%Y, %-I:%M:%S %p")
-                    except:
-                        date_str = str(created_at)
-                
-                # Format amount display
-                amount_text = f"Amount credited" if tx_type == "credit" else f"Amount debited"
-                
-                message += f"✉️ {reason}\n"
-                message += f"<b>{amount_text}</b>: {amount} 💰\n"
-                message += f"<b>Closing balance</b>: {closing_balance} 💎\n"
-                message += f"📅 Created On: {date_str}\n\n"
+            message = format_transactions_message(
+                f"💎 Transaction History\n📩 Page {result['current_page']} of {result['total_pages']}",
+                result["transactions"]
+            )
             
             # Create pagination keyboard
             keyboard = []
@@ -1128,10 +1071,10 @@ async def handle_transaction_history(update: Update, context: ContextTypes.DEFAU
             # Navigation buttons (only if multiple pages)
             if result["total_pages"] > 1:
                 nav_row = []
-                if result["current_page"] > 1:
-                    nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"history_transactions_page_{result['current_page'] - 1}"))
-                if result["current_page"] < result["total_pages"]:
-                    nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"history_transactions_page_{result['current_page'] + 1}"))
+                if result["prev_before"] is not None:
+                    nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"history_transactions_before_{result['prev_before']}"))
+                if result["next_before"] is not None:
+                    nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"history_transactions_before_{result['next_before']}"))
                 if nav_row:
                     keyboard.append(nav_row)
             
@@ -1141,7 +1084,8 @@ async def handle_transaction_history(update: Update, context: ContextTypes.DEFAU
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1153,51 +1097,45 @@ async def handle_transaction_history(update: Update, context: ContextTypes.DEFAU
         await query.edit_message_text(
             text=message,
             reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
+            parse_mode='HTML',
+            disable_web_page_preview=True
         )
 
 async def handle_number_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle number history button"""
     query = update.callback_query
     
-    message = "🛒 Number History\n\n🍒 You don't have any recent number history."
-    
-    # Create back button to return to history menu
-    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    
-    keyboard = [
-        [InlineKeyboardButton("« Back", callback_data="history")]
-    ]
-    
     await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode='HTML'
+        text=_NUMBER_HISTORY_MSG,
+        reply_markup=_NUMBER_HISTORY_KEYBOARD,
+        parse_mode='HTML',
+        disable_web_page_preview=True
     )
 
+async def edit_message_if_changed(query, context: ContextTypes.DEFAULT_TYPE, text: str, reply_markup=None, **kwargs):
+    """Edit the callback's message, skipping the API call when it already shows this content"""
+    edit_key = (query.message.message_id if query.message else None, hash((text, reply_markup)))
+    if context.user_data.get('last_edit') == edit_key:
+        return
+    
+    kwargs.setdefault('disable_web_page_preview', True)
+    await query.edit_message_text(text=text, reply_markup=reply_markup, **kwargs)
+    context.user_data['last_edit'] = edit_key
+
 async def handle_admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin callback queries"""
     query = update.callback_query
     callback_data = query.data
     
     # Check if user is admin
-    from src.config.bot_config import BotConfig
-    config = BotConfig()
-    if not config.ADMIN_USER_ID or str(query.from_user.id) != str(config.ADMIN_USER_ID):
+    if query.from_user.id not in _get_admin_ids():
         await query.answer("❌ You don't have admin permissions!")
         return
     
     # Handle different admin callbacks
-    if callback_data == "admin_back":
-        await handle_admin_back(update, context)
-    elif callback_data == "admin_users":
-        await handle_admin_users(update, context)
-    elif callback_data == "admin_auto_import":
-        await handle_admin_auto_import(update, context)
-    elif callback_data == "admin_add_promocode":
-        await handle_admin_add_promocode(update, context)
-    elif callback_data == "admin_manual_payments":
-        await handle_admin_manual_payments(update, context)
+    handler = _ADMIN_DISPATCH.get(callback_data)
+    if handler:
+        await handler(update, context)
     else:
         await query.answer("This admin feature is not implemented yet!")
 
@@ -1207,312 +1145,140 @@ async def handle_admin_back(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Recreate the admin message
     username = query.from_user.username or query.from_user.first_name
-    message = f"👋 Hello @{username}\n\n"
-    message += "Admin Commands:\n\n"
-    message += "👉 Add Balance - /add 1980442239 100\n"
-    message += "👉 Cut Balance - /cut 1980442239 100\n"
-    message += "👉 User Transaction History - /trnx 1980442239\n"
-    message += "👉 User Number History - /nums 1980442239\n"
-    message += "👉 User SMM service History - /smm_history 1980442239\n"
-    message += "👉 Ban User - /ban 1980442239\n"
-    message += "👉 Unban User - /unban 1980442239\n"
-    message += "👉 Broadcast a message - /broadcast hello everyone\n\n"
-    message += "⚠️ Remember to replace 1980442239 with actual user id."
-    
-    # Create admin keyboard with Web App buttons
-    from src.config.bot_config import BotConfig
-    config = BotConfig()
-    backend_url = config.BACKEND_URL
-    
-    keyboard = [
-        [
-            InlineKeyboardButton("Dashboard", web_app={"url": f"{backend_url}/admin-dashboard"}),
-            InlineKeyboardButton("Users", callback_data="admin_users")
-        ],
-        [InlineKeyboardButton("Auto Import API Services", callback_data="admin_auto_import")],
-        [
-            InlineKeyboardButton("Add Server", web_app={"url": f"{backend_url}/add-server"}),
-            InlineKeyboardButton("Add Service", web_app={"url": f"{backend_url}/add-service"})
-        ],
-        [
-            InlineKeyboardButton("Connect API", web_app={"url": f"{backend_url}/connect-api"}),
-            InlineKeyboardButton("Edit Bot Settings", web_app={"url": f"{backend_url}/bot-settings"})
-        ],
-        [InlineKeyboardButton("View My Services", web_app={"url": f"{backend_url}/my-services"})],
-        [InlineKeyboardButton("QR Code", web_app={"url": f"{backend_url}/qr-code"})],
-        [InlineKeyboardButton("Add Promocode", callback_data="admin_add_promocode")],
-        [InlineKeyboardButton("View Manual Payments", callback_data="admin_manual_payments")]
-    ]
+    message = f"👋 Hello @{username}\n\n{_ADMIN_COMMANDS_MSG}"
     
-    await query.edit_message_text(
+    # Admin keyboard with Web App buttons
+    await edit_message_if_changed(
+        query, context,
         text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=_build_admin_panel_keyboard(_get_bot_config().BACKEND_URL),
         parse_mode='HTML'
     )
 
 async def handle_admin_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin dashboard"""
-    query = update.callback_query
-    
-    message = "📊 Admin Dashboard\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_DASHBOARD_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin users"""
-    query = update.callback_query
-    
-    message = "👥 Users Management\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_USERS_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_auto_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin auto import"""
-    query = update.callback_query
-    
-    message = "🔄 Auto Import API Services\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_AUTO_IMPORT_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_add_server(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin add server"""
-    query = update.callback_query
-    
-    message = "🖥️ Add Server\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_ADD_SERVER_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_add_service(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin add service"""
-    query = update.callback_query
-    
-    message = "📦 Add Service\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_ADD_SERVICE_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_connect_api(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin connect API"""
-    query = update.callback_query
-    
-    message = "🔗 Connect API\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_CONNECT_API_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_bot_settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin bot settings"""
-    query = update.callback_query
-    
-    message = "⚙️ Edit Bot Settings\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_BOT_SETTINGS_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_view_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin view services"""
-    query = update.callback_query
-    
-    message = "👀 View My Services\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_VIEW_SERVICES_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_add_promocode(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin add promocode"""
-    query = update.callback_query
-    
-    message = "🎫 Add Promocode\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_ADD_PROMOCODE_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_add_temp_mail(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin add temp mail"""
-    query = update.callback_query
-    
-    message = "📧 Add Temp Mail\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_ADD_TEMP_MAIL_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_add_email(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin add email"""
-    query = update.callback_query
-    
-    message = "📮 Add Email\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_ADD_EMAIL_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_smm_services(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin SMM services"""
-    query = update.callback_query
-    
-    message = "📈 SMM Services\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_SMM_SERVICES_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
 async def handle_admin_manual_payments(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle admin manual payments"""
-    query = update.callback_query
-    
-    message = "💳 View Manual Payments\n\nThis feature is coming soon!"
-    
-    keyboard = [[InlineKeyboardButton("« Back to Admin", callback_data="admin_back")]]
-    
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await edit_message_if_changed(
+        update.callback_query, context,
+        text=_ADMIN_MANUAL_PAYMENTS_MSG,
+        reply_markup=_ADMIN_BACK_KEYBOARD,
         parse_mode='Markdown'
     )
 
-async def handle_server_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle server selection callback"""
-    try:
-        logger.info("🎯 SERVER CALLBACK HANDLER TRIGGERED!")
-        query = update.callback_query
-        
-        # Parse callback data
-        callback_data = query.data
-        logger.info(f"🔍 DEBUG: Server callback data: {callback_data}")
-        
-        if not callback_data.startswith('srv:'):
-            logger.info(f"🔍 DEBUG: Callback doesn't start with 'srv:', skipping")
-            return
-        
-        parts = callback_data.split(':')
-        if len(parts) != 3:
-            await query.edit_message_text("❌ Invalid callback data")
-            return
-        
-        service_id = parts[1]
-        server_id = parts[2]
-        
-        logger.info(f"🔍 User {update.effective_user.id} selected server {server_id} for service {service_id}")
-        
-        # Initialize service database
-        from src.database.service_db import ServiceDatabase
-        service_db = ServiceDatabase()
-        await service_db.initialize()
-        
-        # Get service and server data
-        service = await service_db.get_service_by_id(service_id)
-        server = await service_db.get_server_by_id(server_id)
-        
-        if not service or not server:
-            await query.edit_message_text("❌ Service or server not found")
-            return
-        
-        service_name = service.get('name', 'Unknown')
-        server_name = server.get('name', 'Unknown Server')
-        
-        # Show processing message
-        await query.edit_message_text(
-            f"Processing your request… ⏳\n"
-            f"Service: {service_name}\n"
-            f"Server: {server_name}"
-        )
-        
-        # Call server API
-        logger.info(f"🌐 Calling API for server {server_name}")
-        api_result = await service_db.call_server_api(server, service_name)
-        
-        if api_result['success']:
-            # Extract number from API response
-            data = api_result['data']
-            number = data.get('number') or data.get('phone') or data.get('phone_number')
-            
-            if number:
-                await query.edit_message_text(
-                    f"From {server_name} ({service_name}): {number}"
-                )
-                logger.info(f"✅ Successfully returned number {number} from {server_name}")
-            else:
-                await query.edit_message_text(
-                    f"{server_name} is unavailable or returned no numbers. Try another server."
-                )
-                logger.warning(f"⚠️ Server {server_name} returned no number in response")
-        else:
-            await query.edit_message_text(
-                f"{server_name} is unavailable or returned no numbers. Try another server."
-            )
-            logger.error(f"❌ Server {server_name} API failed: {api_result.get('error', 'Unknown error')}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error in handle_server_callback: {e}")
-        try:
-            await query.edit_message_text(
-                "❌ An error occurred while processing your request.\n"
-                "Please try again later."
-            )
-        except:
-            pass
+_ADMIN_DISPATCH = {
+    "admin_back": handle_admin_back,
+    "admin_users": handle_admin_users,
+    "admin_auto_import": handle_admin_auto_import,
+    "admin_add_promocode": handle_admin_add_promocode,
+    "admin_manual_payments": handle_admin_manual_payments,
+}
 
 async def handle_unknown_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle unknown callback data"""
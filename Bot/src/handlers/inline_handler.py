@@ -4,158 +4,156 @@ Inline Query Handler for Services
 
 from telegram import Update, InlineQueryResultArticle, InputTextMessageContent, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+import asyncio
 import logging
-from src.database.user_db import UserDatabase
-from src.database.service_db import ServiceDatabase
+import time
+from typing import NamedTuple
+from src.database.user_db import get_user_db
+from src.handlers.service_handler import render_servers_keyboard
 
 logger = logging.getLogger(__name__)
 
-# Country flag emojis mapping
-COUNTRY_FLAGS = {
-    'IN': '🇮🇳', 'US': '🇺🇸', 'GB': '🇬🇧', 'CA': '🇨🇦', 'AU': '🇦🇺',
-    'DE': '🇩🇪', 'FR': '🇫🇷', 'IT': '🇮🇹', 'ES': '🇪🇸', 'NL': '🇳🇱',
-    'BR': '🇧🇷', 'MX': '🇲🇽', 'AR': '🇦🇷', 'CL': '🇨🇱', 'CO': '🇨🇴',
-    'PE': '🇵🇪', 'VE': '🇻🇪', 'EC': '🇪🇨', 'BO': '🇧🇴', 'PY': '🇵🇾',
-    'UY': '🇺🇾', 'GY': '🇬🇾', 'SR': '🇸🇷', 'GF': '🇬🇫', 'FK': '🇫🇰',
-    'RU': '🇷🇺', 'CN': '🇨🇳', 'JP': '🇯🇵', 'KR': '🇰🇷', 'SG': '🇸🇬',
-    'MY': '🇲🇾', 'TH': '🇹🇭', 'VN': '🇻🇳', 'PH': '🇵🇭', 'ID': '🇮🇩',
-    'PK': '🇵🇰', 'BD': '🇧🇩', 'LK': '🇱🇰', 'NP': '🇳🇵', 'BT': '🇧🇹',
-    'MV': '🇲🇻', 'MM': '🇲🇲', 'LA': '🇱🇦', 'KH': '🇰🇭', 'MN': '🇲🇳',
-    'KZ': '🇰🇿', 'UZ': '🇺🇿', 'KG': '🇰🇬', 'TJ': '🇹🇯', 'TM': '🇹🇲',
-    'AF': '🇦🇫', 'IR': '🇮🇷', 'IQ': '🇮🇶', 'SA': '🇸🇦', 'AE': '🇦🇪',
-    'QA': '🇶🇦', 'KW': '🇰🇼', 'BH': '🇧🇭', 'OM': '🇴🇲', 'YE': '🇾🇪',
-    'JO': '🇯🇴', 'LB': '🇱🇧', 'SY': '🇸🇾', 'IL': '🇮🇱', 'PS': '🇵🇸',
-    'EG': '🇪🇬', 'SD': '🇸🇩', 'LY': '🇱🇾', 'TN': '🇹🇳', 'DZ': '🇩🇿',
-    'MA': '🇲🇦', 'EH': '🇪🇭', 'MR': '🇲🇷', 'ML': '🇲🇱', 'BF': '🇧🇫',
-    'NE': '🇳🇪', 'TD': '🇹🇩', 'NG': '🇳🇬', 'CM': '🇨🇲', 'CF': '🇨🇫',
-    'CG': '🇨🇬', 'CD': '🇨🇩', 'GA': '🇬🇦', 'GQ': '🇬🇶', 'ST': '🇸🇹',
-    'GW': '🇬🇼', 'GN': '🇬🇳', 'SL': '🇸🇱', 'LR': '🇱🇷', 'CI': '🇨🇮',
-    'GH': '🇬🇭', 'TG': '🇹🇬', 'BJ': '🇧🇯', 'SN': '🇸🇳', 'GM': '🇬🇲',
-    'CV': '🇨🇻', 'MZ': '🇲🇿', 'ZW': '🇿🇼', 'BW': '🇧🇼', 'NA': '🇳🇦',
-    'ZA': '🇿🇦', 'LS': '🇱🇸', 'SZ': '🇸🇿', 'MG': '🇲🇬', 'MU': '🇲🇺',
-    'SC': '🇸🇨', 'KM': '🇰🇲', 'DJ': '🇩🇯', 'SO': '🇸🇴', 'ET': '🇪🇹',
-    'ER': '🇪🇷', 'SS': '🇸🇸', 'KE': '🇰🇪', 'UG': '🇺🇬', 'RW': '🇷🇼',
-    'BI': '🇧🇮', 'TZ': '🇹🇿', 'MW': '🇲🇼', 'ZM': '🇿🇲', 'AO': '🇦🇴'
-}
+# The unfiltered service list shown for an empty inline query is kept here;
+# typed queries are filtered by MongoDB instead
+SERVICES_CACHE_TTL = 30
+INLINE_SEARCH_LIMIT = 10
+
+# Telegram caches inline answers per query text and shares them across users. The
+# browse list changes least, searches a bit more, and empty answers should expire quickly
+BROWSE_CACHE_TIME = 300
+SEARCH_CACHE_TIME = 60
+EMPTY_RESULTS_CACHE_TIME = 5
+
+# Telegram accepts at most 50 results per inline answer
+MAX_INLINE_RESULTS = 50
+_services_cache = None  # (fetched_at, ServiceCatalog)
+_services_cache_lock = asyncio.Lock()
+
+# Refilled in the background a little before the TTL runs out, so queries never wait on the database
+SERVICES_REFRESH_INTERVAL = SERVICES_CACHE_TTL - 5
+_services_refresh_task = None
+
+def group_services_by_name(services: list) -> dict:
+    """Group services by name; get_services/search_services already strip names and drop invalid ones"""
+    service_groups = {}
+    for service in services:
+        service_groups.setdefault(service['name'], []).append(service)
+    return service_groups
+
+class ServiceCatalog(NamedTuple):
+    """Service list plus lookups built once per cache fill"""
+    services: list
+    by_name: dict
+    by_id: dict
+
+async def get_cached_services(force_refresh: bool = False) -> ServiceCatalog:
+    """Return the service catalog, refreshing from the database once the TTL expires"""
+    global _services_cache
+    
+    # Fresh hits return without the lock, so queries never wait behind a running refresh
+    cached = _services_cache
+    if not force_refresh and cached and time.monotonic() - cached[0] < SERVICES_CACHE_TTL:
+        return cached[1]
+    
+    async with _services_cache_lock:
+        # Another caller may have refilled the catalog while this one waited for the lock
+        cached = _services_cache
+        if not force_refresh and cached and time.monotonic() - cached[0] < SERVICES_CACHE_TTL:
+            return cached[1]
+        
+        user_db = await get_user_db()
+        
+        # Drop the decorator's copy first, otherwise a refresh would just re-read a result up to a minute old
+        type(user_db).get_services.cache_clear()
+        services = await user_db.get_services()
+        
+        # Index once per fill; the empty inline query and chosen results look services up by name and ID
+        catalog = ServiceCatalog(
+            services=services,
+            by_name=group_services_by_name(services),
+            by_id={service['id']: service for service in services}
+        )
+        
+        # Don't pin an empty result, so a transient DB failure is retried on the next query
+        if services:
+            _services_cache = (time.monotonic(), catalog)
+        
+        return catalog
+
+def clear_services_cache():
+    """Forget the cached catalog so the next query reloads it"""
+    global _services_cache
+    _services_cache = None
+
+async def _refresh_services_loop():
+    """Keep the service catalog warm until cancelled"""
+    while True:
+        await asyncio.sleep(SERVICES_REFRESH_INTERVAL)
+        try:
+            await get_cached_services(force_refresh=True)
+        except Exception as e:
+            logger.error(f"❌ Error refreshing service catalog: {e}")
+
+async def warm_services_cache():
+    """Load the service catalog at startup and start the background refresh"""
+    global _services_refresh_task
+    
+    try:
+        catalog = await get_cached_services(force_refresh=True)
+        logger.info("🔥 Service catalog warmed with %s services", len(catalog.services))
+    except Exception as e:
+        logger.error(f"❌ Error warming service catalog: {e}")
+    
+    if _services_refresh_task is None:
+        _services_refresh_task = asyncio.create_task(_refresh_services_loop())
+
+async def stop_services_refresh():
+    """Cancel the background catalog refresh"""
+    global _services_refresh_task
+    
+    if _services_refresh_task is not None:
+        _services_refresh_task.cancel()
+        try:
+            await _services_refresh_task
+        except asyncio.CancelledError:
+            pass
+        _services_refresh_task = None
 
 async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle inline queries for services"""
     try:
-        logger.info("🚀 INLINE QUERY HANDLER STARTED")
-        logger.info("🔥🔥🔥 THIS SHOULD APPEAR WHEN YOU SEARCH 🔥🔥🔥")
-        logger.info("=" * 60)
-        
-        # Handle null checks for inline queries
-        if update.effective_user:
-            logger.info(f"🔍 User ID: {update.effective_user.id}")
-        else:
-            logger.info("🔍 User ID: None (inline query)")
-            
-        if update.effective_chat:
-            logger.info(f"🔍 Chat ID: {update.effective_chat.id}")
-        else:
-            logger.info("🔍 Chat ID: None (inline query)")
-        
         query = update.inline_query.query
-        logger.info(f"🔍 Inline query received: '{query}'")
-        logger.info(f"🔍 Query length: {len(query)}")
-        
-        # Get services from database
-        logger.info("📦 Initializing UserDatabase...")
-        user_db = UserDatabase()
-        logger.info(f"🔍 UserDatabase instance: {user_db}")
-        logger.info(f"🔍 UserDatabase client exists: {hasattr(user_db, 'client')}")
-        logger.info(f"🔍 UserDatabase client is None: {user_db.client is None if hasattr(user_db, 'client') else 'No client attr'}")
+        logger.debug("🔍 Inline query from %s: '%s'", update.inline_query.from_user.id, query)
         
-        if not hasattr(user_db, 'client') or user_db.client is None:
-            logger.info("📦 Initializing database connection...")
-            await user_db.initialize()
-            logger.info("✅ Database initialized")
-        
-        logger.info("📦 Fetching services from database...")
-        services = await user_db.get_services()
-        logger.info(f"🔍 Raw services data: {services}")
+        # Typed queries are matched in MongoDB; the empty query shows the cached list
+        if query:
+            user_db = await get_user_db()
+            services = await user_db.search_services(query, limit=INLINE_SEARCH_LIMIT)
+            service_groups = group_services_by_name(services)
+        else:
+            services, service_groups, _ = await get_cached_services()
+        logger.debug("🔍 Fetched %d services", len(services))
         
         if not services:
             logger.warning("⚠️ No services found in database")
             await update.inline_query.answer(
                 results=[],
-                cache_time=60
+                cache_time=EMPTY_RESULTS_CACHE_TIME
             )
             return
         
-        logger.info(f"✅ Found {len(services)} services for inline search")
-        
-        # Debug each service
-        for i, service in enumerate(services):
-            logger.info(f"🔍 Service {i+1}:")
-            logger.info(f"  - ID: {service.get('id', 'NO_ID')}")
-            logger.info(f"  - Name: {service.get('name', 'NO_NAME')}")
-            logger.info(f"  - Description: {service.get('description', 'NO_DESC')}")
-            logger.info(f"  - Price: {service.get('price', 'NO_PRICE')}")
-            logger.info(f"  - Full service data: {service}")
-        
-        # Filter services based on query if provided
-        if query:
-            logger.info(f"🔍 Filtering services for query: '{query}'")
-            filtered_services = []
-            query_lower = query.lower()
-            for service in services:
-                service_name = service.get('name', '').lower()
-                service_desc = service.get('description', '').lower()
-                logger.info(f"🔍 Checking service: {service.get('name', 'UNKNOWN')}")
-                logger.info(f"  - Service name (lower): {service_name}")
-                logger.info(f"  - Service desc (lower): {service_desc}")
-                logger.info(f"  - Query (lower): {query_lower}")
-                logger.info(f"  - Name match: {query_lower in service_name}")
-                logger.info(f"  - Desc match: {query_lower in service_desc}")
-                
-                if (query_lower in service_name or query_lower in service_desc):
-                    filtered_services.append(service)
-                    logger.info(f"  - ✅ Service matched!")
-                else:
-                    logger.info(f"  - ❌ Service not matched")
-            
-            services = filtered_services
-            logger.info(f"🔍 Filtered to {len(services)} services matching '{query}'")
-        
-        # Filter out services with empty or "Unknown" names
-        if services:
-            valid_services = []
-            for service in services:
-                service_name = service.get('name', '').strip()
-                if service_name and service_name.lower() != 'unknown' and service_name != '':
-                    valid_services.append(service)
-                else:
-                    logger.info(f"🔍 Filtering out invalid service: {service_name}")
-            
-            services = valid_services
-            logger.info(f"🔍 After filtering invalid names: {len(services)} valid services")
-        
         # If no services after filtering, return empty results
-        if not services:
+        if not service_groups:
             logger.warning("⚠️ No valid services found after filtering")
             await update.inline_query.answer(
                 results=[],
-                cache_time=60
+                cache_time=EMPTY_RESULTS_CACHE_TIME
             )
             return
         
         # Create inline results - show all services with same name
         results = []
-        if services:
-            # Group services by name to show all variants
-            service_groups = {}
-            for service in services:
-                service_name = service.get('name', '').strip()
-                # Double-check to ensure we don't include invalid service names
-                if service_name and service_name.lower() != 'unknown' and service_name != '':
-                    if service_name not in service_groups:
-                        service_groups[service_name] = []
-                    service_groups[service_name].append(service)
-            
-            logger.info(f"🔍 Found {len(service_groups)} unique service names")
-            
+        if service_groups:
             # Create one result per unique service name
             for service_name, service_variants in service_groups.items():
                 # Use the first service as the representative
@@ -163,18 +161,11 @@ async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE
                 service_id = service.get('id', 'NO_ID')
                 service_desc = service.get('description', 'No description available')
                 
-                logger.info(f"🔍 Creating result for service group: {service_name}")
-                logger.info(f"  - Service variants: {len(service_variants)}")
-                logger.info(f"  - Representative ID: {service_id}")
-                
                 result_id = f"service_{service_id}"
                 title = f"📦 {service_name}"
                 description = f"{service_desc} ({len(service_variants)} servers available)"
                 
-                logger.info(f"🔍 Creating InlineQueryResultArticle:")
-                logger.info(f"  - ID: {result_id}")
-                logger.info(f"  - Title: {title}")
-                logger.info(f"  - Description: {description}")
+                logger.debug("🔍 Inline result %s: %s (%s variants)", result_id, title, len(service_variants))
                 
                 result = InlineQueryResultArticle(
                     id=result_id,
@@ -186,111 +177,76 @@ async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE
                     )
                 )
                 results.append(result)
-                logger.info(f"✅ Result created for {service_name}")
         else:
             logger.warning("⚠️ No services to create results for")
         
-        logger.info(f"✅ Created {len(results)} inline search result")
-        
         # Answer inline query
-        logger.info("📤 Answering inline query...")
         await update.inline_query.answer(
-            results=results,
-            cache_time=60  # Cache for 1 minute
+            results=results[:MAX_INLINE_RESULTS],
+            cache_time=SEARCH_CACHE_TIME if query else BROWSE_CACHE_TIME,
+            is_personal=False,
+            next_offset=""
         )
-        logger.info("✅ Inline query answered successfully")
-        logger.info("=" * 60)
-        
-        # Send a test message to verify inline query is working
-        if update.effective_user:
-            try:
-                await context.bot.send_message(
-                    chat_id=update.effective_user.id,
-                    text="🔍 DEBUG: Inline query handler is working!"
-                )
-                logger.info("✅ Test message sent for inline query")
-            except Exception as test_error:
-                logger.error(f"❌ Failed to send test message: {test_error}")
+        logger.debug("✅ Answered inline query '%s' with %d results", query, len(results))
         
     except Exception as e:
-        logger.error(f"❌ Error in inline query handler: {e}")
-        import traceback
-        logger.error(f"❌ Full traceback: {traceback.format_exc()}")
+        logger.exception("❌ Error in inline query handler: %s", e)
+        if update.inline_query is None:
+            return
         try:
             await update.inline_query.answer(
                 results=[],
-                cache_time=60
+                cache_time=EMPTY_RESULTS_CACHE_TIME
             )
             logger.info("✅ Sent empty results as fallback")
         except Exception as inner_e:
-            logger.error(f"❌ Failed to answer inline query: {inner_e}")
-            logger.error(f"❌ Inner traceback: {traceback.format_exc()}")
+            logger.exception("❌ Failed to answer inline query: %s", inner_e)
 
 async def handle_chosen_inline_result(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle when user selects an inline result"""
     try:
-        logger.info("🎯 CHOSEN INLINE RESULT HANDLER TRIGGERED!")
-        logger.info("🔥🔥🔥 THIS SHOULD APPEAR WHEN YOU CLICK ON A SERVICE 🔥🔥🔥")
-        logger.info("=" * 60)
-        
-        # Send immediate test message to verify handler is working
-        if update.effective_user:
-            await context.bot.send_message(
-                chat_id=update.effective_user.id,
-                text="🔍 DEBUG: Inline result handler is working!"
-            )
-            logger.info("✅ Test message sent")
-        
-        # Handle null checks for inline queries
-        if update.effective_user:
-            logger.info(f"🔍 User ID: {update.effective_user.id}")
-        else:
-            logger.info("🔍 User ID: None (inline query)")
-            
-        if update.effective_chat:
-            logger.info(f"🔍 Chat ID: {update.effective_chat.id}")
-        else:
-            logger.info("🔍 Chat ID: None (inline query)")
-            
-        logger.info(f"🔍 DEBUG: Update type: {type(update)}")
-        
         chosen_result = update.chosen_inline_result
-        logger.info(f"🔍 DEBUG: Chosen result: {chosen_result}")
-        logger.info(f"🔍 DEBUG: Chosen result type: {type(chosen_result)}")
+        logger.debug("🔍 DEBUG: Chosen result: %s", chosen_result)
+        logger.debug("🔍 DEBUG: Chosen result type: %s", type(chosen_result))
         
         if not chosen_result:
             logger.error("❌ No chosen result found!")
             return
             
         result_id = chosen_result.result_id
-        logger.info(f"🔍 DEBUG: Chosen result_id: {result_id}")
-        logger.info(f"🔍 DEBUG: Result ID type: {type(result_id)}")
+        logger.debug("🔍 DEBUG: Chosen result_id: %s", result_id)
+        logger.debug("🔍 DEBUG: Result ID type: %s", type(result_id))
         
         if not result_id:
             logger.error("❌ No result_id found!")
             return
             
         if not result_id.startswith("service_"):
-            logger.info(f"🔍 DEBUG: Result ID doesn't start with 'service_', skipping")
-            logger.info(f"🔍 DEBUG: Result ID: '{result_id}'")
+            logger.debug("🔍 DEBUG: Result ID doesn't start with 'service_', skipping")
+            logger.debug("🔍 DEBUG: Result ID: '%s'", result_id)
             return
         
         # Extract service ID
-        service_id = result_id.replace("service_", "")
-        logger.info(f"🔍 DEBUG: Extracted service_id: {service_id}")
-        logger.info(f"🔍 DEBUG: Service ID type: {type(service_id)}")
+        service_id = result_id[len("service_"):]
+        logger.debug("🔍 DEBUG: Extracted service_id: %s", service_id)
+        logger.debug("🔍 DEBUG: Service ID type: %s", type(service_id))
         
         user_id = update.effective_user.id if update.effective_user else "Unknown"
-        logger.info(f"🔍 User {user_id} selected service {service_id}")
-        logger.info("=" * 50)
-        
-        # Simple approach: Just show server variants for the selected service
-        logger.info("📦 STEP 1: Getting service variants...")
-        user_db = UserDatabase()
-        await user_db.initialize()
-        
-        # Get the selected service
-        service = await user_db.get_service_by_id(service_id)
+        logger.info("🔍 User %s selected service %s", user_id, service_id)
+        
+        # Look the selected service up in the cached catalog; only go to the database
+        # for a service added since the last refresh
+        logger.debug("📦 STEP 1: Getting service variants...")
+        catalog = await get_cached_services()
+        service = catalog.by_id.get(service_id)
+        if service is not None:
+            service_variants = catalog.by_name.get(service.get('name', '').strip())
+        else:
+            # Not in the catalog yet: fetch the service and its variants in one query
+            user_db = await get_user_db()
+            found = await user_db.get_service_and_variants(service_id)
+            if found:
+                service, service_variants = found["service"], found["variants"]
         if not service:
             await context.bot.send_message(
                 chat_id=update.effective_user.id,
@@ -299,13 +255,9 @@ async def handle_chosen_inline_result(update: Update, context: ContextTypes.DEFA
             return
         
         service_name = service.get('name', 'Unknown Service')
-        logger.info(f"🔍 STEP 2: Found service: {service_name}")
+        logger.debug("🔍 STEP 2: Found service: %s", service_name)
         
-        # Get all variants of this service
-        all_services = await user_db.get_services()
-        service_variants = [s for s in all_services if s.get('name') == service_name]
-        
-        logger.info(f"🔍 STEP 3: Found {len(service_variants)} variants for {service_name}")
+        logger.debug("🔍 STEP 3: Found %s variants for %s", len(service_variants or ()), service_name)
         
         if not service_variants:
             await context.bot.send_message(
@@ -314,42 +266,18 @@ async def handle_chosen_inline_result(update: Update, context: ContextTypes.DEFA
             )
             return
         
-        # Directly execute the show_server command
-        command = f"/show_server {service_name.upper()}"
-        
-        logger.info(f"🔧 STEP 4: Directly executing: {command}")
-        
-        # Create fake context with the service name as argument
-        fake_context = type('Context', (), {
-            'args': [service_name.upper()],
-            'bot': context.bot
-        })()
-        
-        # Create fake update
-        fake_update = type('Update', (), {
-            'message': type('Message', (), {
-                'reply_text': lambda text, **kwargs: context.bot.send_message(
-                    chat_id=update.effective_user.id, text=text, **kwargs
-                ),
-                'text': command,
-                'chat': {'id': update.effective_user.id},
-                'from_user': update.effective_user
-            })(),
-            'effective_user': update.effective_user,
-            'effective_chat': type('Chat', (), {'id': update.effective_user.id})()
-        })()
-        
-        # Import and call the show_server handler directly
-        from src.handlers.service_handler import handle_show_server
-        await handle_show_server(fake_update, fake_context)
+        # Send the same server picker /show_server would, straight from the cached variants
+        text, reply_markup = render_servers_keyboard(service_name.upper(), service_variants)
+        await context.bot.send_message(
+            chat_id=update.effective_user.id,
+            text=text,
+            reply_markup=reply_markup
+        )
         
-        logger.info(f"✅ Successfully executed command for {service_name}")
-        logger.info("=" * 50)
+        logger.info("✅ Successfully executed command for %s", service_name)
         
     except Exception as e:
-        logger.error(f"❌ Error in chosen inline result handler: {e}")
-        import traceback
-        logger.error(f"❌ Full traceback: {traceback.format_exc()}")
+        logger.exception("❌ Error in chosen inline result handler: %s", e)
         try:
             # For inline queries, send to the user's chat
             chat_id = update.effective_user.id if update.effective_user else None
@@ -361,5 +289,4 @@ async def handle_chosen_inline_result(update: Update, context: ContextTypes.DEFA
                 )
                 logger.info("✅ Sent error message to user")
         except Exception as send_error:
-            logger.error(f"❌ Failed to send error message: {send_error}")
-            logger.error(f"❌ Send error traceback: {traceback.format_exc()}")
+            logger.exception("❌ Failed to send error message: %s", send_error)
@@ -0,0 +1,74 @@
+"""
+Update Middleware Module
+"""
+
+import asyncio
+import logging
+import time
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from src.database.user_db import get_user_db
+from src.utils.rate_limiter import check_rate_limit
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MESSAGE = "⚠️ Rate limit exceeded. Please wait a moment before trying again."
+BANNED_MESSAGE = "🚫 You have been banned from using this bot. Please contact support for assistance."
+
+# Banned user IDs are read from MongoDB at most once per interval; /ban and /unban update them directly
+BANNED_USERS_REFRESH_INTERVAL = 60
+_banned_users = frozenset()
+_banned_users_loaded_at = None
+_banned_users_lock = asyncio.Lock()
+
+async def get_banned_users() -> frozenset:
+    """Return the cached set of banned user IDs, reloading it once the interval passes"""
+    global _banned_users, _banned_users_loaded_at
+    
+    if _banned_users_loaded_at is not None and time.monotonic() - _banned_users_loaded_at < BANNED_USERS_REFRESH_INTERVAL:
+        return _banned_users
+    
+    async with _banned_users_lock:
+        if _banned_users_loaded_at is None or time.monotonic() - _banned_users_loaded_at >= BANNED_USERS_REFRESH_INTERVAL:
+            user_db = await get_user_db()
+            _banned_users = frozenset(await user_db.get_banned_user_ids())
+            _banned_users_loaded_at = time.monotonic()
+    return _banned_users
+
+def set_user_banned(user_id: int, banned: bool):
+    """Apply a ban or unban to the cached set right away"""
+    global _banned_users
+    _banned_users = _banned_users | {user_id} if banned else _banned_users - {user_id}
+
+async def _reject(update: Update, text: str):
+    """Tell the user why their update was dropped, where Telegram gives us a way to"""
+    if update.callback_query:
+        await update.callback_query.answer(text, show_alert=True)
+    elif update.inline_query:
+        await update.inline_query.answer([], cache_time=0, is_personal=True)
+    elif update.effective_chat:
+        await update.effective_chat.send_message(text)
+
+async def gate_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Stop updates from banned or rate-limited users before any handler runs"""
+    user = update.effective_user
+    if user is None:
+        return
+    
+    try:
+        if user.id in await get_banned_users():
+            await _reject(update, BANNED_MESSAGE)
+            raise ApplicationHandlerStop
+        
+        # Inline queries arrive on every keystroke, so only messages and button presses count
+        if update.message or update.callback_query:
+            is_allowed, _ = check_rate_limit(user.id)
+            if not is_allowed:
+                await _reject(update, RATE_LIMIT_MESSAGE)
+                raise ApplicationHandlerStop
+    except ApplicationHandlerStop:
+        raise
+    except Exception as e:
+        # Never lose an update because the gate itself failed
+        logger.error(f"❌ Error in update gate for user {user.id}: {e}")
@@ -2,43 +2,41 @@
 Service Handler Module
 """
 
+import asyncio
 import logging
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ChatAction
 from telegram.ext import ContextTypes
-from src.database.service_db import ServiceDatabase
+from src.database.user_db import get_user_db
+from src.utils.callback_data import pack_object_id
 
 logger = logging.getLogger(__name__)
 
-# Country flag emojis mapping
-COUNTRY_FLAGS = {
-    'IN': '🇮🇳', 'US': '🇺🇸', 'GB': '🇬🇧', 'CA': '🇨🇦', 'AU': '🇦🇺',
-    'DE': '🇩🇪', 'FR': '🇫🇷', 'IT': '🇮🇹', 'ES': '🇪🇸', 'NL': '🇳🇱',
-    'BR': '🇧🇷', 'MX': '🇲🇽', 'AR': '🇦🇷', 'CL': '🇨🇱', 'CO': '🇨🇴',
-    'PE': '🇵🇪', 'VE': '🇻🇪', 'EC': '🇪🇨', 'BO': '🇧🇴', 'PY': '🇵🇾',
-    'UY': '🇺🇾', 'GY': '🇬🇾', 'SR': '🇸🇷', 'GF': '🇬🇫', 'FK': '🇫🇰',
-    'RU': '🇷🇺', 'CN': '🇨🇳', 'JP': '🇯🇵', 'KR': '🇰🇷', 'SG': '🇸🇬',
-    'MY': '🇲🇾', 'TH': '🇹🇭', 'VN': '🇻🇳', 'PH': '🇵🇭', 'ID': '🇮🇩',
-    'IN': '🇮🇳', 'PK': '🇵🇰', 'BD': '🇧🇩', 'LK': '🇱🇰', 'NP': '🇳🇵',
-    'BT': '🇧🇹', 'MV': '🇲🇻', 'MM': '🇲🇲', 'LA': '🇱🇦', 'KH': '🇰🇭',
-    'MN': '🇲🇳', 'KZ': '🇰🇿', 'UZ': '🇺🇿', 'KG': '🇰🇬', 'TJ': '🇹🇯',
-    'TM': '🇹🇲', 'AF': '🇦🇫', 'IR': '🇮🇷', 'IQ': '🇮🇶', 'SA': '🇸🇦',
-    'AE': '🇦🇪', 'QA': '🇶🇦', 'KW': '🇰🇼', 'BH': '🇧🇭', 'OM': '🇴🇲',
-    'YE': '🇾🇪', 'JO': '🇯🇴', 'LB': '🇱🇧', 'SY': '🇸🇾', 'IL': '🇮🇱',
-    'PS': '🇵🇸', 'EG': '🇪🇬', 'SD': '🇸🇩', 'LY': '🇱🇾', 'TN': '🇹🇳',
-    'DZ': '🇩🇿', 'MA': '🇲🇦', 'EH': '🇪🇭', 'MR': '🇲🇷', 'ML': '🇲🇱',
-    'BF': '🇧🇫', 'NE': '🇳🇪', 'TD': '🇹🇩', 'NG': '🇳🇬', 'CM': '🇨🇲',
-    'CF': '🇨🇫', 'CG': '🇨🇬', 'CD': '🇨🇩', 'GA': '🇬🇦', 'GQ': '🇬🇶',
-    'ST': '🇸🇹', 'GW': '🇬🇼', 'GN': '🇬🇳', 'SL': '🇸🇱', 'LR': '🇱🇷',
-    'CI': '🇨🇮', 'GH': '🇬🇭', 'TG': '🇹🇬', 'BJ': '🇧🇯', 'SN': '🇸🇳',
-    'GM': '🇬🇲', 'GN': '🇬🇳', 'GW': '🇬🇼', 'CV': '🇨🇻', 'MZ': '🇲🇿',
-    'ZW': '🇿🇼', 'BW': '🇧🇼', 'NA': '🇳🇦', 'ZA': '🇿🇦', 'LS': '🇱🇸',
-    'SZ': '🇸🇿', 'MG': '🇲🇬', 'MU': '🇲🇺', 'SC': '🇸🇨', 'KM': '🇰🇲',
-    'DJ': '🇩🇯', 'SO': '🇸🇴', 'ET': '🇪🇹', 'ER': '🇪🇷', 'SS': '🇸🇸',
-    'KE': '🇰🇪', 'UG': '🇺🇬', 'RW': '🇷🇼', 'BI': '🇧🇮', 'TZ': '🇹🇿',
-    'MW': '🇲🇼', 'ZM': '🇿🇲', 'AO': '🇦🇴', 'CG': '🇨🇬', 'CD': '🇨🇩',
-    'CF': '🇨🇫', 'CM': '🇨🇲', 'GQ': '🇬🇶', 'GA': '🇬🇦', 'ST': '🇸🇹',
-    'SAO': '🇸🇹', 'PRINCIPE': '🇸🇹', 'TOME': '🇸🇹'
-}
+SELECT_SERVER_TEMPLATE = "➤ Selected Service : {name}\n↓ Choose Server Below"
+
+def render_servers_keyboard(service_name: str, service_variants: list):
+    """Build the server picker text and keyboard, one "<server> - <price> 💎" button per service variant"""
+    reply_markup = InlineKeyboardMarkup([
+        [InlineKeyboardButton(
+            f"{variant.get('server', 'Unknown Server')} - {variant.get('price', '₹0')} 💎",
+            callback_data=f"server_{pack_object_id(variant.get('id', 'NO_ID'))}"
+        )]
+        for variant in service_variants
+    ])
+    return SELECT_SERVER_TEMPLATE.format(name=service_name), reply_markup
+
+# Rendered server pickers by upper-cased service name: (built_at, text, reply_markup).
+# Matches the get_services cache lifetime, since that is where the variants come from
+SERVERS_KEYBOARD_TTL = 60
+_servers_keyboard_cache = {}
+
+def clear_servers_keyboard_cache(service_name: str = None):
+    """Forget the rendered server picker for one service, or for all of them"""
+    if service_name is None:
+        _servers_keyboard_cache.clear()
+    else:
+        _servers_keyboard_cache.pop(service_name.upper(), None)
 
 async def handle_show_server(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /show_server <SERVICE_NAME> command"""
@@ -55,49 +53,39 @@ async def handle_show_server(update: Update, context: ContextTypes.DEFAULT_TYPE)
         service_name = context.args[0].upper()
         logger.info(f"🔍 User {update.effective_user.id} requested servers for service: {service_name}")
         
-        # Initialize user database (same as other handlers)
-        from src.database.user_db import UserDatabase
-        user_db = UserDatabase()
-        await user_db.initialize()
+        cached_picker = _servers_keyboard_cache.get(service_name)
+        if cached_picker and time.monotonic() - cached_picker[0] < SERVERS_KEYBOARD_TTL:
+            await update.message.reply_text(cached_picker[1], reply_markup=cached_picker[2])
+            return
+        
+        # Shared, already-initialized user database
+        user_db = await get_user_db()
         
-        # Get all services and find the one with matching name
-        all_services = await user_db.get_services()
-        service_variants = [s for s in all_services if s.get('name', '').upper() == service_name]
+        # Only the services with this name, via the case-insensitive name index; show
+        # "typing…" while MongoDB is queried instead of before it
+        service_variants, typing_result = await asyncio.gather(
+            user_db.get_services_by_name(service_name),
+            context.bot.send_chat_action(update.effective_chat.id, ChatAction.TYPING),
+            return_exceptions=True
+        )
+        if isinstance(service_variants, BaseException):
+            raise service_variants
+        if isinstance(typing_result, BaseException):
+            logger.debug("Could not send typing action: %s", typing_result)
         
         if not service_variants:
+            # The full (cached) list is only needed to suggest names
+            all_services = await user_db.get_services()
             await update.message.reply_text(
                 f"❌ Service '{service_name}' not found.\n"
                 "Available services: " + ", ".join(set(s.get('name', '') for s in all_services))
             )
             return
         
-        # Use the first variant as representative
-        service = service_variants[0]
-        service_id = service.get('id', 'NO_ID')
-        
-        # Create inline keyboard with service variants
-        keyboard = []
-        for service_variant in service_variants:
-            variant_id = service_variant.get('id', 'NO_ID')
-            server_name = service_variant.get('server', 'Unknown Server')
-            price = service_variant.get('price', '₹0')
-            
-            # Create button text with price and diamond emoji
-            button_text = f"{server_name} - {price} 💎"
-            
-            # Create callback data for server selection
-            callback_data = f"server_{variant_id}"
-            
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         # Send response
-        await update.message.reply_text(
-            f"➤ Selected Service : {service_name}\n"
-            "↓ Choose Server Below",
-            reply_markup=reply_markup
-        )
+        text, reply_markup = render_servers_keyboard(service_name, service_variants)
+        _servers_keyboard_cache[service_name] = (time.monotonic(), text, reply_markup)
+        await update.message.reply_text(text, reply_markup=reply_markup)
         
         logger.info(f"✅ Sent {len(service_variants)} server variants for service {service_name}")
         
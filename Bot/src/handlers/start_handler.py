@@ -2,14 +2,12 @@
 Start Command Handler
 """
 
-import re
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 
-from src.database.user_db import UserDatabase
+from src.database.user_db import get_user_db
 from src.utils.keyboard_utils import create_main_keyboard
-from src.utils.rate_limiter import check_rate_limit
 from src.config.security_config import security_config
 
 logger = logging.getLogger(__name__)
@@ -44,14 +42,7 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         chat_id = update.effective_chat.id
         
-        # Check rate limiting
-        is_allowed, remaining = check_rate_limit(user.id)
-        if not is_allowed:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="⚠️ Rate limit exceeded. Please wait a moment before trying again."
-            )
-            return
+        # Rate limiting and bans are enforced for every update in src.handlers.middleware
         
         # Validate user input
         if not validate_user_input(user.id, user.username, user.first_name):
@@ -81,11 +72,9 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Try to get user data from database in background
         try:
-            user_db = UserDatabase()
-            if not hasattr(user_db, 'client') or user_db.client is None:
-                await user_db.initialize()
+            user_db = await get_user_db()
             
-            db_user_data = await user_db.get_or_create_user(
+            db_user_data = await user_db.get_user_summary(
                 user_id=user.id,
                 username=safe_username,
                 first_name=safe_first_name
@@ -103,26 +92,23 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return
                     
         except Exception as db_error:
-            logger.warning(f"Database error (using default data): {db_error}")
+            logger.warning("Database error (using default data): %s", db_error)
         
         # Create welcome message
         welcome_message = create_welcome_message(user_data)
         
-        # Create inline keyboard
-        keyboard = create_main_keyboard()
-        
         # Send message immediately
         await context.bot.send_message(
             chat_id=chat_id,
             text=welcome_message,
-            reply_markup=keyboard,
+            reply_markup=create_main_keyboard(),
             parse_mode='HTML'
         )
         
-        logger.info(f"✅ Start command handled for user {user.id}")
+        logger.info("✅ Start command handled for user %s", user.id)
         
     except Exception as e:
-        logger.error(f"❌ ERROR in start handler: {e}")
+        logger.error("❌ ERROR in start handler: %s", e)
         
         try:
             # Send fallback message
@@ -131,28 +117,9 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 text="👋 Welcome! Something went wrong. Please try again later."
             )
         except Exception as fallback_error:
-            logger.error(f"❌ Failed to send fallback message: {fallback_error}")
+            logger.error("❌ Failed to send fallback message: %s", fallback_error)
 
-def create_welcome_message(user_data: dict) -> str:
-    """Create welcome message with user stats"""
-    # Sanitize data to prevent XSS
-    first_name = user_data.get('first_name', 'User')
-    if not isinstance(first_name, str):
-        first_name = 'User'
-    
-    balance = user_data.get('balance', 0.0)
-    if not isinstance(balance, (int, float)):
-        balance = 0.0
-    
-    total_purchased = user_data.get('total_purchased', 0)
-    if not isinstance(total_purchased, int):
-        total_purchased = 0
-    
-    total_used = user_data.get('total_used', 0)
-    if not isinstance(total_used, int):
-        total_used = 0
-    
-    message = f"""👋 Hello {first_name} !
+WELCOME_TEMPLATE = """👋 Hello {first_name} !
 
 💰 Your Balance: {balance:.2f} 💎
 📊 Total Numbers Purchased: {total_purchased}
@@ -160,5 +127,13 @@ def create_welcome_message(user_data: dict) -> str:
 
 ~~You can use this 💎 for purchasing Numbers..
 ~~For Support Click on Support below."""
-    
-    return message
+
+def create_welcome_message(user_data: dict) -> str:
+    """Create welcome message with user stats"""
+    # get_user_summary normalizes field types at ingestion; only missing or empty values need defaults
+    return WELCOME_TEMPLATE.format(
+        first_name=user_data.get('first_name') or 'User',
+        balance=user_data.get('balance') or 0.0,
+        total_purchased=user_data.get('total_purchased') or 0,
+        total_used=user_data.get('total_used') or 0
+    )
@@ -2,15 +2,27 @@
 Cache Manager for performance optimization
 """
 
-import time
+from time import monotonic as _now
 import asyncio
-from typing import Dict, Any, Optional, Callable
+import heapq
+import itertools
+from collections import OrderedDict
+import sys
+from typing import Dict, Any, Optional, Callable, Hashable
 import logging
 from functools import wraps
-import json
 
 logger = logging.getLogger(__name__)
 
+class _CacheEntry:
+    """One cached value; slots keep it smaller than a list or dict and avoid a per-entry __dict__"""
+    __slots__ = ('value', 'expires_at', 'hits')
+    
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.hits = 0
+
 class CacheManager:
     """Simple in-memory cache with TTL and automatic cleanup"""
     
@@ -18,8 +30,13 @@ class CacheManager:
         self.default_ttl = default_ttl
         self.max_size = max_size
         self.cleanup_interval = cleanup_interval
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.last_cleanup = time.time()
+        # Kept in least-recently-used order: hits and re-sets move an entry to the end
+        self.cache: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        # Min-heap of (expires_at, seq, key); seq breaks ties so keys are never compared
+        self._expiry_heap: list = []
+        self._expiry_seq = itertools.count()
+        self._expiry_changed: Optional[asyncio.Event] = None
+        self.last_cleanup = _now()
         self._cleanup_task: Optional[asyncio.Task] = None
         self._initialized = False
     
@@ -30,6 +47,7 @@ class CacheManager:
         
         try:
             loop = asyncio.get_running_loop()
+            self._expiry_changed = asyncio.Event()
             self._cleanup_task = loop.create_task(self._periodic_cleanup())
             self._initialized = True
             logger.debug("Cache manager initialized with periodic cleanup")
@@ -39,10 +57,18 @@ class CacheManager:
             self._initialized = True
     
     async def _periodic_cleanup(self):
-        """Periodic cleanup of expired entries"""
+        """Sleep until the next entry expires, then drop everything that has expired"""
         while True:
             try:
-                await asyncio.sleep(self.cleanup_interval)
+                self._expiry_changed.clear()
+                timeout = self._expiry_heap[0][0] - _now() if self._expiry_heap else None
+                if timeout is None or timeout > 0:
+                    # Woken early when set() schedules an expiry sooner than the current head
+                    try:
+                        await asyncio.wait_for(self._expiry_changed.wait(), timeout)
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
                 self._cleanup_expired()
                 logger.debug(f"Cache cleanup completed. Active entries: {len(self.cache)}")
             except asyncio.CancelledError:
@@ -52,93 +78,96 @@ class CacheManager:
     
     def _cleanup_expired(self):
         """Remove expired cache entries"""
-        current_time = time.time()
-        expired_keys = []
+        current_time = _now()
+        heap = self._expiry_heap
         
-        for key, entry in self.cache.items():
-            if current_time > entry['expires_at']:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.cache[key]
+        while heap and heap[0][0] < current_time:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # Skip heap records left behind by keys that were re-set, deleted or evicted since
+            if entry is not None and entry.expires_at == expires_at:
+                del self.cache[key]
     
-    def _make_key(self, *args, **kwargs) -> str:
+    def _make_key(self, *args, **kwargs) -> Hashable:
         """Create a cache key from function arguments"""
-        # Convert args and kwargs to a string representation
-        key_parts = [str(arg) for arg in args]
-        key_parts.extend(f"{k}:{v}" for k, v in sorted(kwargs.items()))
-        return "|".join(key_parts)
+        # Hash the arguments as a tuple; fall back to their string form if any isn't hashable
+        key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+        try:
+            hash(key)
+        except TypeError:
+            key = "|".join([str(arg) for arg in args] + [f"{k}:{v}" for k, v in sorted(kwargs.items())])
+        return key
     
-    def get(self, key: str) -> Optional[Any]:
+    def get(self, key: Hashable) -> Optional[Any]:
         """Get value from cache"""
-        try:
-            # Periodic cleanup check
-            current_time = time.time()
-            if current_time - self.last_cleanup > self.cleanup_interval:
-                self._cleanup_expired()
-                self.last_cleanup = current_time
-            
-            if key in self.cache:
-                entry = self.cache[key]
-                if current_time <= entry['expires_at']:
-                    entry['hits'] += 1
-                    return entry['value']
-                else:
-                    # Remove expired entry
-                    del self.cache[key]
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting from cache: {e}")
+        current_time = _now()
+        # The periodic task sweeps expired entries; only sweep inline when it isn't running
+        if self._cleanup_task is None and current_time - self.last_cleanup > self.cleanup_interval:
+            self._cleanup_expired()
+            self.last_cleanup = current_time
+        
+        entry = self.cache.get(key)
+        if entry is None:
             return None
+        
+        if current_time <= entry.expires_at:
+            entry.hits += 1
+            self.cache.move_to_end(key)
+            return entry.value
+        
+        # Remove expired entry
+        del self.cache[key]
+        return None
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> bool:
         """Set value in cache with TTL"""
-        try:
-            # Check cache size limit
-            if len(self.cache) >= self.max_size:
-                self._evict_oldest()
-            
-            ttl = ttl or self.default_ttl
-            expires_at = time.time() + ttl
-            
-            self.cache[key] = {
-                'value': value,
-                'expires_at': expires_at,
-                'created_at': time.time(),
-                'hits': 0
-            }
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error setting cache: {e}")
-            return False
+        # Check cache size limit
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        elif len(self.cache) >= self.max_size:
+            self._evict_oldest()
+        
+        ttl = ttl or self.default_ttl
+        expires_at = _now() + ttl
+        
+        self.cache[key] = _CacheEntry(value, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, next(self._expiry_seq), key))
+        if self._expiry_changed is not None and self._expiry_heap[0][0] == expires_at:
+            self._expiry_changed.set()
+        
+        return True
     
     def _evict_oldest(self):
-        """Evict the oldest cache entry"""
+        """Evict the least recently used cache entry"""
         if not self.cache:
             return
         
-        oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k]['created_at'])
-        del self.cache[oldest_key]
+        self.cache.popitem(last=False)
     
-    def delete(self, key: str) -> bool:
+    def delete(self, key: Hashable) -> bool:
         """Delete a cache entry"""
         try:
-            if key in self.cache:
-                del self.cache[key]
-                return True
-            return False
+            return self.cache.pop(key, None) is not None
         except Exception as e:
             logger.error(f"Error deleting from cache: {e}")
             return False
     
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every entry cached under a @cached key prefix; returns how many were removed"""
+        try:
+            stale = [key for key in self.cache if type(key) is tuple and key[0] == prefix]
+            for key in stale:
+                del self.cache[key]
+            return len(stale)
+        except Exception as e:
+            logger.error(f"Error deleting cache prefix {prefix}: {e}")
+            return 0
+    
     def clear(self) -> bool:
         """Clear all cache entries"""
         try:
             self.cache.clear()
+            self._expiry_heap.clear()
             return True
         except Exception as e:
             logger.error(f"Error clearing cache: {e}")
@@ -150,7 +179,7 @@ class CacheManager:
             self._cleanup_expired()
             
             total_entries = len(self.cache)
-            total_hits = sum(entry['hits'] for entry in self.cache.values())
+            total_hits = sum(entry.hits for entry in self.cache.values())
             avg_hits = total_hits / total_entries if total_entries > 0 else 0
             
             return {
@@ -168,11 +197,11 @@ class CacheManager:
     def _estimate_memory_usage(self) -> float:
         """Estimate memory usage in MB"""
         try:
-            # Rough estimation
+            # Shallow sizes: cheap and allocation-free, at the cost of not following nested objects
+            getsizeof = sys.getsizeof
             total_size = 0
             for key, entry in self.cache.items():
-                # Key size + entry overhead + value size estimation
-                total_size += len(key) + 64 + len(str(entry['value']))
+                total_size += getsizeof(key) + getsizeof(entry) + getsizeof(entry.value)
             
             return round(total_size / (1024 * 1024), 2)
         except:
@@ -189,6 +218,7 @@ class CacheManager:
                     pass
             
             self.cache.clear()
+            self._expiry_heap.clear()
             logger.info("Cache manager shutdown completed")
             
         except Exception as e:
@@ -197,48 +227,73 @@ class CacheManager:
 # Global cache instance
 cache_manager = CacheManager()
 
-def cached(ttl: Optional[int] = None, key_prefix: str = ""):
-    """Decorator for caching function results"""
+# Loads currently running for @cached async functions, by cache key
+_inflight: Dict[Hashable, asyncio.Future] = {}
+
+def cached(ttl: Optional[int] = None, key_prefix: str = "", key: Optional[Callable[..., Hashable]] = None):
+    """Decorator for caching function results; key, if given, builds the cache key from the call arguments"""
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            cache_key = f"{key_prefix}:{func.__name__}:{cache_manager._make_key(*args, **kwargs)}"
-            
-            # Try to get from cache
-            cached_result = cache_manager.get(cache_key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return cached_result
-            
-            # Execute function and cache result
-            result = await func(*args, **kwargs)
-            cache_manager.set(cache_key, result, ttl)
-            logger.debug(f"Cache miss for {func.__name__}, cached result")
-            
-            return result
+        # Shared by every key for this function; interned so prefix comparisons are pointer checks
+        prefix = sys.intern(f"{key_prefix}:{func.__name__}")
+        # Bound once here so each call skips the attribute lookups on cache_manager
+        cache_get = cache_manager.get
+        cache_set = cache_manager.set
+        make_key = key or cache_manager._make_key
+        
+        # Build only the wrapper this function needs
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                cache_key = (prefix, make_key(*args, **kwargs))
+
+                # Try to get from cache
+                cached_result = cache_get(cache_key)
+                if cached_result is not None:
+                    logger.debug(f"Cache hit for {func.__name__}")
+                    return cached_result
+
+                # Concurrent misses for the same key share one call instead of each hitting the backend
+                load = _inflight.get(cache_key)
+                if load is None:
+                    async def _load():
+                        result = await func(*args, **kwargs)
+                        cache_set(cache_key, result, ttl)
+                        logger.debug(f"Cache miss for {func.__name__}, cached result")
+                        return result
+
+                    load = asyncio.ensure_future(_load())
+                    _inflight[cache_key] = load
+                    load.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+
+                # Shield so one cancelled caller doesn't cancel the load for the others
+                return await asyncio.shield(load)
+
+            wrapper.cache_clear = lambda: cache_manager.delete_prefix(prefix)
+            wrapper.cache_delete = lambda cache_key: cache_manager.delete((prefix, cache_key))
+            return wrapper
         
         @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            cache_key = f"{key_prefix}:{func.__name__}:{cache_manager._make_key(*args, **kwargs)}"
+        def wrapper(*args, **kwargs):
+            cache_key = (prefix, make_key(*args, **kwargs))
             
             # Try to get from cache
-            cached_result = cache_manager.get(cache_key)
+            cached_result = cache_get(cache_key)
             if cached_result is not None:
                 logger.debug(f"Cache hit for {func.__name__}")
                 return cached_result
             
             # Execute function and cache result
             result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result, ttl)
+            cache_set(cache_key, result, ttl)
             logger.debug(f"Cache miss for {func.__name__}, cached result")
             
             return result
         
-        # Return appropriate wrapper based on function type
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper
-        else:
-            return sync_wrapper
+        # Lets writers drop every cached result of this function after changing its data
+        wrapper.cache_clear = lambda: cache_manager.delete_prefix(prefix)
+        # Drops the single entry stored under a key as built by the key function
+        wrapper.cache_delete = lambda cache_key: cache_manager.delete((prefix, cache_key))
+        return wrapper
     
     return decorator
 
@@ -251,7 +306,7 @@ def clear_cache() -> bool:
     """Clear all cache entries"""
     return cache_manager.clear()
 
-def delete_cache_key(key: str) -> bool:
+def delete_cache_key(key: Hashable) -> bool:
     """Delete a specific cache key"""
     return cache_manager.delete(key)
 
@@ -0,0 +1,30 @@
+"""
+Callback Data Utilities
+"""
+
+import base64
+import binascii
+
+# A 12-byte ObjectId packs into 16 url-safe base64 characters instead of 24 hex ones
+PACKED_OBJECT_ID_LENGTH = 16
+# Prefixed to packed IDs so they can't be confused with other 16-character IDs; never part of the base64 alphabet
+PACKED_OBJECT_ID_MARKER = "~"
+
+def pack_object_id(object_id: str) -> str:
+    """Shorten an ObjectId hex string for callback data; other IDs are returned unchanged"""
+    try:
+        raw = bytes.fromhex(object_id)
+    except (TypeError, ValueError):
+        return object_id
+    if len(raw) != 12:
+        return object_id
+    return PACKED_OBJECT_ID_MARKER + base64.urlsafe_b64encode(raw).decode()
+
+def unpack_object_id(packed: str) -> str:
+    """Reverse pack_object_id, accepting unpacked IDs as they are"""
+    if len(packed) != PACKED_OBJECT_ID_LENGTH + 1 or not packed.startswith(PACKED_OBJECT_ID_MARKER):
+        return packed
+    try:
+        return base64.urlsafe_b64decode(packed[1:]).hex()
+    except (binascii.Error, ValueError):
+        return packed
@@ -0,0 +1,20 @@
+"""
+Event loop setup
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+def install_uvloop() -> bool:
+    """Use uvloop for the event loop when it is installed"""
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("✅ Using uvloop event loop")
+    return True
@@ -2,9 +2,13 @@
 Keyboard Utilities Module
 """
 
+from functools import lru_cache
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from typing import List
+from typing import Any, List, Tuple
 
+# The fixed menus below are built on first use and then shared; PTB markups are immutable
+
+@lru_cache(maxsize=None)
 def create_main_keyboard() -> InlineKeyboardMarkup:
     """Create the main menu inline keyboard"""
     keyboard = [
@@ -28,6 +32,7 @@ def create_main_keyboard() -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(keyboard)
 
+@lru_cache(maxsize=None)
 def create_back_keyboard() -> InlineKeyboardMarkup:
     """Create a back button keyboard"""
     keyboard = [
@@ -37,22 +42,27 @@ def create_back_keyboard() -> InlineKeyboardMarkup:
 
 def create_services_keyboard(services: List[dict]) -> InlineKeyboardMarkup:
     """Create services keyboard (placeholder for future implementation)"""
-    keyboard = []
-    
-    # Add service buttons (placeholder)
-    for i, service in enumerate(services[:6]):  # Limit to 6 services
-        keyboard.append([
-            InlineKeyboardButton(
-                f"{service.get('name', 'Service')} - ₹{service.get('price', '0')}", 
-                callback_data=f"service_{service.get('id', i)}"
-            )
-        ])
+    # Keyed on what the buttons show, so an edited service simply misses instead of needing invalidation
+    items = tuple(
+        (service.get('id', i), service.get('name', 'Service'), service.get('price', '0'))
+        for i, service in enumerate(services[:6])  # Limit to 6 services
+    )
+    return _build_services_keyboard(items)
+
+@lru_cache(maxsize=64)
+def _build_services_keyboard(items: Tuple[Tuple[Any, str, Any], ...]) -> InlineKeyboardMarkup:
+    """Build the services keyboard for a tuple of (id, name, price) items"""
+    keyboard = [
+        [InlineKeyboardButton(f"{name} - ₹{price}", callback_data=f"service_{service_id}")]
+        for service_id, name, price in items
+    ]
     
     # Add back button
     keyboard.append([InlineKeyboardButton("« Back", callback_data="back_to_main")])
     
     return InlineKeyboardMarkup(keyboard)
 
+@lru_cache(maxsize=None)
 def create_balance_keyboard() -> InlineKeyboardMarkup:
     """Create balance overview keyboard"""
     keyboard = [
@@ -66,6 +76,7 @@ def create_balance_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(keyboard)
 
+@lru_cache(maxsize=None)
 def create_transactions_keyboard() -> InlineKeyboardMarkup:
     """Create transactions keyboard"""
     keyboard = [
@@ -75,6 +86,7 @@ def create_transactions_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(keyboard)
 
+@lru_cache(maxsize=None)
 def create_payment_keyboard() -> InlineKeyboardMarkup:
     """Create payment options keyboard (placeholder)"""
     keyboard = [
@@ -3,23 +3,30 @@ Rate Limiter Utility with improved memory management
 """
 
 import time
+from time import monotonic as _now
 import asyncio
+from collections import OrderedDict
 from typing import Dict, Tuple, Optional
 import logging
-from collections import defaultdict
 import weakref
 
 logger = logging.getLogger(__name__)
 
+# Most stale buckets dropped per cleanup step before yielding back to the event loop
+CLEANUP_BATCH_SIZE = 1000
+
 class RateLimiter:
-    """Improved in-memory rate limiter with automatic cleanup"""
+    """Improved in-memory token-bucket rate limiter with automatic cleanup"""
     
     def __init__(self, max_requests: int = 60, window_seconds: int = 60, cleanup_interval: int = 300):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
         self.cleanup_interval = cleanup_interval
-        self.requests: Dict[int, list] = defaultdict(list)
-        self.last_cleanup = time.time()
+        # Each user's bucket holds up to max_requests tokens and refills max_requests per window
+        self.refill_rate = max_requests / window_seconds
+        # user_id -> (tokens, last_update), kept in last_update order so cleanup only touches the stale head
+        self.buckets: "OrderedDict[int, Tuple[float, float]]" = OrderedDict()
+        self.last_cleanup = _now()
         self._cleanup_task: Optional[asyncio.Task] = None
         self._initialized = False
     
@@ -43,93 +50,75 @@ class RateLimiter:
         while True:
             try:
                 await asyncio.sleep(self.cleanup_interval)
-                self._cleanup_all_old_requests()
-                logger.debug(f"Rate limiter cleanup completed. Active users: {len(self.requests)}")
+                # Sweep in batches so a large expiry never stalls other handlers
+                while self._cleanup_all_old_requests(CLEANUP_BATCH_SIZE):
+                    await asyncio.sleep(0)
+                logger.debug(f"Rate limiter cleanup completed. Active users: {len(self.buckets)}")
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in rate limiter cleanup: {e}")
     
-    def _cleanup_old_requests(self, user_id: int):
-        """Remove old requests outside the time window for a specific user"""
-        current_time = time.time()
-        if user_id in self.requests:
-            self.requests[user_id] = [
-                req_time for req_time in self.requests[user_id]
-                if current_time - req_time < self.window_seconds
-            ]
-            
-            # Remove user if no requests remain
-            if not self.requests[user_id]:
-                del self.requests[user_id]
+    def _current_tokens(self, user_id: int, current_time: float) -> float:
+        """Tokens in a user's bucket right now, after refilling for the time since its last update"""
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            return float(self.max_requests)
+        tokens, last_update = bucket
+        return min(self.max_requests, tokens + (current_time - last_update) * self.refill_rate)
     
-    def _cleanup_all_old_requests(self):
-        """Cleanup old requests for all users"""
-        current_time = time.time()
-        users_to_remove = []
-        
-        for user_id, requests in self.requests.items():
-            # Filter out old requests
-            self.requests[user_id] = [
-                req_time for req_time in requests
-                if current_time - req_time < self.window_seconds
-            ]
-            
-            # Mark for removal if no requests remain
-            if not self.requests[user_id]:
-                users_to_remove.append(user_id)
-        
-        # Remove users with no requests
-        for user_id in users_to_remove:
-            del self.requests[user_id]
+    def _touch(self, user_id: int, tokens: float, current_time: float):
+        """Store a user's bucket and move it to the most recently updated end"""
+        self.buckets[user_id] = (tokens, current_time)
+        self.buckets.move_to_end(user_id)
+    
+    def _cleanup_all_old_requests(self, limit: Optional[int] = None) -> bool:
+        """Drop buckets that have been idle long enough to be full again; True if limit cut the sweep short"""
+        cutoff = _now() - self.window_seconds
+        buckets = self.buckets
+        removed = 0
+        # Oldest buckets come first, so stop at the first one that is still active
+        while buckets:
+            user_id, (_, last_update) = next(iter(buckets.items()))
+            if last_update > cutoff:
+                return False
+            if limit is not None and removed >= limit:
+                return True
+            del buckets[user_id]
+            removed += 1
+        return False
     
     def is_allowed(self, user_id: int) -> Tuple[bool, int]:
         """
         Check if user is allowed to make a request
         Returns: (allowed, remaining_requests)
         """
-        try:
-            # Periodic cleanup check
-            current_time = time.time()
-            if current_time - self.last_cleanup > self.cleanup_interval:
-                self._cleanup_all_old_requests()
-                self.last_cleanup = current_time
-            
-            # Cleanup old requests for this user
-            self._cleanup_old_requests(user_id)
-            
-            # Check if user has exceeded the limit
-            if len(self.requests[user_id]) >= self.max_requests:
-                return False, 0
-            
-            # Add current request
-            self.requests[user_id].append(current_time)
-            
-            remaining = self.max_requests - len(self.requests[user_id])
-            return True, remaining
-            
-        except Exception as e:
-            logger.error(f"Error in rate limiter: {e}")
-            # Allow request if rate limiter fails
-            return True, 1
+        # Periodic cleanup check
+        current_time = _now()
+        if current_time - self.last_cleanup > self.cleanup_interval:
+            self._cleanup_all_old_requests(CLEANUP_BATCH_SIZE)
+            self.last_cleanup = current_time
+        
+        tokens = self._current_tokens(user_id, current_time)
+        
+        # Check if user has exceeded the limit
+        if tokens < 1:
+            self._touch(user_id, tokens, current_time)
+            return False, 0
+        
+        # Spend a token on this request
+        tokens -= 1
+        self._touch(user_id, tokens, current_time)
+        return True, int(tokens)
     
     def get_user_stats(self, user_id: int) -> Dict:
         """Get rate limiting stats for a user"""
         try:
-            self._cleanup_old_requests(user_id)
-            
-            if user_id not in self.requests:
-                return {
-                    'requests_made': 0,
-                    'requests_remaining': self.max_requests,
-                    'window_seconds': self.window_seconds,
-                    'reset_time': time.time() + self.window_seconds
-                }
-            
-            requests_made = len(self.requests[user_id])
+            current_time = _now()
+            remaining = int(self._current_tokens(user_id, current_time))
             return {
-                'requests_made': requests_made,
-                'requests_remaining': max(0, self.max_requests - requests_made),
+                'requests_made': self.max_requests - remaining,
+                'requests_remaining': remaining,
                 'window_seconds': self.window_seconds,
                 'reset_time': time.time() + self.window_seconds
             }
@@ -145,10 +134,7 @@ class RateLimiter:
     def reset_user(self, user_id: int) -> bool:
         """Reset rate limit for a specific user"""
         try:
-            if user_id in self.requests:
-                del self.requests[user_id]
-                return True
-            return False
+            return self.buckets.pop(user_id, None) is not None
         except Exception as e:
             logger.error(f"Error resetting user rate limit: {e}")
             return False
@@ -158,8 +144,14 @@ class RateLimiter:
         try:
             self._cleanup_all_old_requests()
             
-            total_users = len(self.requests)
-            total_requests = sum(len(requests) for requests in self.requests.values())
+            current_time = _now()
+            total_users = len(self.buckets)
+            max_requests, refill_rate = self.max_requests, self.refill_rate
+            # Read the buckets in place rather than looking each user up again through _current_tokens
+            total_requests = sum(
+                max_requests - int(min(max_requests, tokens + (current_time - last_update) * refill_rate))
+                for tokens, last_update in self.buckets.values()
+            )
             
             return {
                 'total_users': total_users,
@@ -175,11 +167,8 @@ class RateLimiter:
     def _estimate_memory_usage(self) -> float:
         """Estimate memory usage in MB"""
         try:
-            # Rough estimation: each user_id (int) + list of timestamps
-            total_size = 0
-            for user_id, requests in self.requests.items():
-                # user_id (int) + list overhead + timestamps
-                total_size += 8 + 64 + (len(requests) * 8)  # 8 bytes per timestamp
+            # Rough estimation: user_id (int) + dict slot + (tokens, last_update) tuple of two floats
+            total_size = len(self.buckets) * (8 + 64 + 56 + 2 * 24)
             
             return round(total_size / (1024 * 1024), 2)  # Convert to MB
         except:
@@ -196,7 +185,7 @@ class RateLimiter:
                     pass
             
             # Clear all data
-            self.requests.clear()
+            self.buckets.clear()
             logger.info("Rate limiter shutdown completed")
             
         except Exception as e:
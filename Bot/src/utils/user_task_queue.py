@@ -0,0 +1,73 @@
+"""
+Per-user background task queue
+"""
+
+import asyncio
+from typing import Dict, Callable, Awaitable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UserTaskQueue:
+    """Run slow callback work off the update loop, serially per user and concurrently across users"""
+    
+    def __init__(self, max_pending: int = 3):
+        self.max_pending = max_pending
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+    
+    def submit(self, user_id: int, job: Callable[[], Awaitable]) -> bool:
+        """
+        Queue a job for a user
+        Returns: False if the user's queue is full and the job was dropped
+        """
+        queue = self._queues.get(user_id)
+        if queue is None:
+            queue = self._queues[user_id] = asyncio.Queue(maxsize=self.max_pending)
+        
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.debug(f"Dropping queued job for user {user_id}: {self.max_pending} already pending")
+            return False
+        
+        if user_id not in self._workers:
+            self._workers[user_id] = asyncio.get_running_loop().create_task(self._drain(user_id, queue))
+        
+        return True
+    
+    async def _drain(self, user_id: int, queue: asyncio.Queue):
+        """Run a user's jobs in order until the queue is empty"""
+        try:
+            while not queue.empty():
+                job = queue.get_nowait()
+                try:
+                    await job()
+                except Exception as e:
+                    logger.error(f"Error in queued job for user {user_id}: {e}")
+        finally:
+            self._workers.pop(user_id, None)
+            if queue.empty():
+                self._queues.pop(user_id, None)
+    
+    async def shutdown(self):
+        """Cancel all running workers"""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        self._workers.clear()
+        self._queues.clear()
+        logger.info("User task queue shutdown completed")
+
+# Global user task queue instance
+user_task_queue = UserTaskQueue()
+
+def submit_user_task(user_id: int, job: Callable[[], Awaitable]) -> bool:
+    """Queue a job to run in the background for a user"""
+    return user_task_queue.submit(user_id, job)
+
+async def shutdown_user_task_queue():
+    """Shutdown the user task queue"""
+    await user_task_queue.shutdown()
@@ -4,6 +4,7 @@ import os
 import sys
 import asyncio
 import logging
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,8 +32,10 @@ def validate_environment():
         logger.error("Please check your .env file and ensure all required variables are set.")
         return False
     
+    from src.config.bot_config import BOT_TOKEN_RE
+    
     bot_token = os.getenv('BOT_TOKEN')
-    if ':' not in bot_token:
+    if not BOT_TOKEN_RE.fullmatch(bot_token):
         logger.error("❌ Invalid BOT_TOKEN format. Should be in format: <bot_id>:<bot_token>")
         return False
     
@@ -45,19 +48,16 @@ def validate_environment():
     return True
 
 def check_dependencies():
-    required_packages = [
-        'telegram',
-        'motor',
-        'pymongo',
-        'python-dotenv'
-    ]
+    # pip package name -> importable module name
+    required_packages = {
+        'python-telegram-bot': 'telegram',
+        'motor': 'motor',
+        'pymongo': 'pymongo',
+        'python-dotenv': 'dotenv'
+    }
     
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec only locates each module; importing them here would run their heavy top-level code twice
+    missing_packages = [package for package, module in required_packages.items() if find_spec(module) is None]
     
     if missing_packages:
         logger.error(f"❌ Missing required packages: {', '.join(missing_packages)}")
@@ -69,13 +69,10 @@ def check_dependencies():
 
 async def test_database_connection():
     try:
-        from src.config.bot_config import BotConfig
-        from src.database.user_db import UserDatabase
+        from src.database.user_db import get_user_db
         
-        config = BotConfig()
-        user_db = UserDatabase()
-        
-        await user_db.initialize()
+        # Connect through the shared instance so the handlers reuse this connection instead of opening another
+        await get_user_db()
         logger.info("✅ Database connection test passed")
         return True
         
@@ -110,15 +107,15 @@ async def main():
     if not check_dependencies():
         sys.exit(1)
     
-    logger.info("🗄️ Step 3: Testing database connection...")
-    if not await test_database_connection():
+    logger.info("🗄️ Step 3: Testing database connection and bot token...")
+    # Independent network checks, so run them side by side
+    db_ok, token_ok = await asyncio.gather(test_database_connection(), test_bot_token())
+    if not db_ok:
         logger.warning("⚠️ Database connection failed, but continuing...")
-    
-    logger.info("🤖 Step 4: Testing bot token...")
-    if not await test_bot_token():
+    if not token_ok:
         sys.exit(1)
     
-    logger.info("🎯 Step 5: Starting bot...")
+    logger.info("🎯 Step 4: Starting bot...")
     try:
         from main import OTPBot
         
@@ -140,6 +137,8 @@ async def main():
             await bot.shutdown()
 
 if __name__ == "__main__":
+    from src.utils.event_loop import install_uvloop
+    install_uvloop()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
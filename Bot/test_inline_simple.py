@@ -5,52 +5,76 @@ Simple test for inline queries
 
 import asyncio
 import logging
-from telegram import Bot, InlineQueryResultArticle, InputTextMessageContent
+import os
+import signal
+from telegram import InlineQueryResultArticle, InputTextMessageContent
 from telegram.ext import Application, InlineQueryHandler, ChosenInlineResultHandler
+from dotenv import load_dotenv
+
+# Load bot token from env once at import, before the event loop starts
+load_dotenv('env.bot')
+BOT_TOKEN = os.getenv('BOT_TOKEN')
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# This script's log format has no thread/process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+# Raw epoch seconds instead of asctime, which runs strftime for every record
+logging.basicConfig(level=logging.INFO, format='{created:.3f} - {name} - {levelname} - {message}', style='{')
 logger = logging.getLogger(__name__)
 
-async def handle_inline_query(update, context):
-    """Simple inline query handler"""
-    logger.info("🔍 Inline query received!")
-    logger.info(f"🔍 Query: {update.inline_query.query}")
-    
-    # Create a simple result
-    result = InlineQueryResultArticle(
+# The reply never changes, so build it once instead of on every keystroke; PTB objects are immutable
+STATIC_RESULTS = (
+    InlineQueryResultArticle(
         id="test_service",
         title="📦 Test Service",
         description="This is a test service",
         input_message_content=InputTextMessageContent(
             message_text="/show_server TEST SERVICE"
         )
-    )
+    ),
+)
+
+STATIC_RESULTS_CACHE_TIME = 3600
+
+async def handle_inline_query(update, context):
+    """Simple inline query handler"""
+    logger.info("🔍 Inline query received!")
+    logger.info(f"🔍 Query: {update.inline_query.query}")
     
-    await update.inline_query.answer([result])
+    # Same answer for every user, so Telegram may serve repeats from its own cache without asking the bot
+    await update.inline_query.answer(
+        STATIC_RESULTS,
+        cache_time=STATIC_RESULTS_CACHE_TIME,
+        is_personal=False,
+        next_offset=""
+    )
     logger.info("✅ Inline query answered")
 
+def _log_send_error(task: asyncio.Task):
+    """Report a failed background send instead of letting the exception go unretrieved"""
+    if not task.cancelled() and task.exception():
+        logger.error(f"❌ Failed to send test message: {task.exception()}")
+
 async def handle_chosen_result(update, context):
     """Simple chosen result handler"""
     logger.info("🎯 CHOSEN RESULT HANDLER CALLED!")
     logger.info(f"🎯 Result ID: {update.chosen_inline_result.result_id}")
     
-    # Send a simple message
+    # Send a simple message in the background so the next update isn't queued behind this request;
+    # the application keeps a reference to the task so it isn't garbage-collected before it finishes
     if update.effective_user:
-        await context.bot.send_message(
+        send = context.application.create_task(context.bot.send_message(
             chat_id=update.effective_user.id,
             text="✅ You selected a service! This handler is working!"
-        )
-        logger.info("✅ Test message sent")
+        ))
+        send.add_done_callback(_log_send_error)
+        logger.info("✅ Test message queued")
 
 async def main():
     """Main function"""
-    # Load bot token from env
-    import os
-    from dotenv import load_dotenv
-    load_dotenv('env.bot')
-    
-    bot_token = os.getenv('BOT_TOKEN')
+    bot_token = BOT_TOKEN
     if not bot_token:
         logger.error("❌ BOT_TOKEN not found!")
         return
@@ -58,7 +82,20 @@ async def main():
     logger.info("🚀 Starting simple inline test bot...")
     
     # Create application without job queue to avoid weak reference issues
-    application = Application.builder().token(bot_token).job_queue(None).build()
+    # Concurrent updates so a slow handler doesn't hold up inline queries from other users.
+    # PTB keeps getUpdates on its own HTTP client; size the outbound pool so concurrent
+    # answers and sends reuse kept-alive connections instead of queueing for the default single one
+    application = (
+        Application.builder()
+        .token(bot_token)
+        .job_queue(None)
+        .concurrent_updates(True)
+        .connection_pool_size(64)
+        .pool_timeout(5)
+        .connect_timeout(10)
+        .get_updates_connection_pool_size(2)
+        .build()
+    )
     
     # Add handlers
     application.add_handler(InlineQueryHandler(handle_inline_query))
@@ -67,18 +104,33 @@ async def main():
     # Start polling
     await application.initialize()
     await application.start()
-    await application.updater.start_polling()
+    # Hold each getUpdates open for up to 30s so an idle bot makes a few requests a minute, not dozens;
+    # read_timeout is the extra margin PTB adds on top of that for the HTTP read
+    await application.updater.start_polling(
+        timeout=30,
+        read_timeout=5,
+        allowed_updates=['inline_query', 'chosen_inline_result']
+    )
     
     logger.info("✅ Bot is running! Test the inline search now.")
     
-    # Keep running
-    try:
-        while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("🛑 Stopping bot...")
-        await application.stop()
-        await application.shutdown()
+    # Park until Ctrl+C / SIGTERM instead of waking the loop every second
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows event loops don't support signal handlers; Ctrl+C still interrupts asyncio.run
+            pass
+    await stop.wait()
+    
+    logger.info("🛑 Stopping bot...")
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
 
 if __name__ == "__main__":
+    from src.utils.event_loop import install_uvloop
+    install_uvloop()
     asyncio.run(main())